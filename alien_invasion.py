@@ -6,51 +6,147 @@ from game_stats import GameStats
 from scoreboard import Scoreboard
 from button import Button
 from ship import Ship
-from alien import Alien
+from bullet import Bullets
+from fleet import Fleet
+from renderer import DirtyRenderer
+from timestep import FixedTimestep
+from profiler import profiler, entity_counts, StartupTimer
+from replay import InputRecorder, state_checksum
+from capture import FrameCapture
+from spectator import SpectatorServer
 
+import assets
 import game_functions as gf # The principle functions that run the game.
 
 def run_game():
-    # Initialise pygame, settings and screen object.
-    pygame.init()
+    # Initialise only the pygame modules the game uses, settings and screen
+    # object.
+    startup = StartupTimer()
+    pygame.display.init()
+    pygame.font.init()
     clock = pygame.time.Clock()
+    startup.mark('pygame')
     # Initialise the games start state includes screen dimensions for the
     # pygame display.
     settings = Settings()
     screen = pygame.display.set_mode(
             (settings.screen_width, settings.screen_height))
     pygame.display.set_caption('Alien Invasion')
+    # The sprites are packed onto an atlas once first drawn.
+    assets.defer_atlas(['alien.png', 'ship.png'])
+    startup.mark('display')
 
     # Make play button, stats and scoreboard.
     play_button = Button(settings, screen, 'Play')
     stats = GameStats(settings)
     sb = Scoreboard(settings, screen, stats)
+    startup.mark('stats and scoreboard')
 
     # Make a ship, a group of bullets and a swarm of aliens.
     ship = Ship(settings, screen)
-    bullets = Group()
+    bullets = Bullets(settings, screen)
     blockade = Group()
-    alien_groups = []
+    fleet = Fleet(settings, screen)
 
     # Create an alien fleet and defences.
-    gf.initialise_fleet(settings, screen, ship, alien_groups)
-    gf.create_fleet(settings, screen, ship, alien_groups)
+    gf.initialise_fleet(settings, screen, ship, fleet)
+    gf.create_fleet(settings, screen, ship, fleet)
     gf.create_defence(settings, screen, blockade)
+    startup.mark('fleet and defence')
 
-    # Start the main game loop.
-    while True:
-        clock.tick(60)
-        gf.check_events(settings, stats, screen, sb, ship, alien_groups,
-                            bullets, blockade, play_button)
+    # Draw by dirty rectangles if asked to, else flip the whole screen.
+    renderer = None
+    if settings.dirty_rendering:
+        renderer = DirtyRenderer(settings, screen)
 
-        if stats.game_active:
-            ship.update()
-            gf.update_bullets(settings, stats, screen, sb, ship, alien_groups,
-                                  bullets, blockade)
-            gf.update_aliens(settings, stats, screen, sb, ship, alien_groups,
-                                 bullets, blockade)
+    # Run the game in fixed ticks, drawing as often as the display allows.
+    timestep = FixedTimestep(settings.tick_rate, settings.max_frame_skip)
 
-        gf.update_screen(settings, stats, screen, sb, ship, alien_groups,
-                             bullets, blockade, play_button)
+    # Time each phase of the loop into a CSV file if asked to.
+    if settings.profile_csv:
+        profiler.open_csv(settings.profile_csv)
 
-run_game()
+    # Record the input of the session to be played back if asked to.
+    recorder = None
+    if settings.record_input:
+        recorder = InputRecorder(settings.record_input, stats.seed)
+
+    # Record the frames drawn if asked to.
+    capture = None
+    if settings.capture_dir:
+        capture = FrameCapture(settings, screen)
+
+    # Serve the state of the game to spectators if asked to.
+    spectators = None
+    if settings.spectator_address:
+        spectators = SpectatorServer(settings)
+
+    startup.mark('renderer and loop')
+
+    # Start the main game loop, owing no time for the start up.
+    timestep.reset()
+    try:
+        while True:
+            clock.tick(settings.max_fps)
+            profiler.start_frame()
+            with profiler.phase('check_events'):
+                events = pygame.event.get()
+                if recorder is not None:
+                    recorder.record(stats.timers.ticks, events)
+                gf.check_events(settings, stats, screen, sb, ship, fleet,
+                                    bullets, blockade, play_button, events)
+
+            for tick in range(timestep.advance()):
+                stats.timers.tick()
+                if stats.game_active and stats.phase == 'play':
+                    with profiler.phase('ship.update'):
+                        ship.update()
+                    with profiler.phase('update_bullets'):
+                        gf.update_bullets(settings, stats, screen, sb, ship,
+                                              fleet, bullets, blockade)
+                    with profiler.phase('update_aliens'):
+                        gf.update_aliens(settings, stats, screen, sb, ship,
+                                             fleet, bullets, blockade)
+                if recorder is not None:
+                    recorder.tick(state_checksum(stats, ship, fleet, bullets,
+                                                 blockade))
+                if spectators is not None:
+                    spectators.publish(stats.timers.ticks, stats, ship, fleet,
+                                       bullets, blockade)
+
+            # Draw between the last two ticks, unless nothing is moving.
+            if stats.game_active and stats.phase == 'play':
+                alpha = timestep.alpha()
+            else:
+                alpha = 1.0
+            with profiler.phase('update_screen'):
+                gf.update_screen(settings, stats, screen, sb, ship, fleet,
+                                     bullets, blockade, play_button, renderer,
+                                     alpha)
+            if capture is not None:
+                capture.capture()
+            if profiler.enabled:
+                profiler.end_frame(entity_counts(fleet, bullets, blockade))
+            if startup is not None:
+                startup.mark('first frame drawn')
+                if settings.report_startup:
+                    print('\n'.join(startup.report()))
+                startup = None
+    finally:
+        profiler.close_csv()
+        stats.leaderboard.close()
+        if recorder is not None:
+            recorder.save()
+        if capture is not None:
+            capture.close()
+            print(capture.report())
+        if spectators is not None:
+            spectators.close()
+            print(spectators.report())
+        if renderer is not None and settings.debug:
+            print(renderer.report())
+        if timestep.dropped or settings.debug:
+            print(timestep.report())
+
+if __name__ == '__main__':
+    run_game()
@@ -0,0 +1,100 @@
+"""Shared image and font cache, each image is decoded and converted to the
+display format once, when first asked for, and the same surface handed to
+everyone that asks for it."""
+import os
+import struct
+
+import pygame
+
+IMAGE_DIR = 'images'
+
+# Cached surfaces keyed by (name, alpha, size).
+_images = {}
+# Images to be packed onto an atlas when the first of them is asked for,
+# keyed by name.
+_atlases = {}
+# Image dimensions read from file headers, keyed by name.
+_sizes = {}
+# Fonts keyed by size.
+_fonts = {}
+
+def load_image(name, alpha=True, size=None):
+    """Return the named image converted for fast blitting, scaled to size if
+    one is given. The display mode must be set before the first call."""
+    key = (name, alpha, size)
+    image = _images.get(key)
+    if image is not None:
+        return image
+
+    if size is None and alpha and name in _atlases:
+        build_atlas(*_atlases[name])
+        return _images[key]
+
+    if size is None:
+        image = pygame.image.load(os.path.join(IMAGE_DIR, name))
+        if alpha:
+            image = image.convert_alpha()
+        else:
+            image = image.convert()
+    else:
+        # Scale once from the unscaled copy, never on the blit.
+        image = load_image(name, alpha)
+        if image.get_size() != tuple(size):
+            image = pygame.transform.smoothscale(image, size)
+    _images[key] = image
+    return image
+
+def build_atlas(names, padding=1):
+    """Pack the named images side by side onto a single surface, the cached
+    copy of each image then being a subsurface of the atlas."""
+    for name in names:
+        _atlases.pop(name, None)
+    images = [load_image(name) for name in names]
+    width = sum(image.get_width() + padding for image in images)
+    height = max(image.get_height() for image in images)
+    atlas = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+    atlas.fill((0, 0, 0, 0))
+
+    x = 0
+    for name, image in zip(names, images):
+        rect = atlas.blit(image, (x, 0))
+        _images[(name, True, None)] = atlas.subsurface(rect)
+        x += rect.width + padding
+    return atlas
+
+def defer_atlas(names, padding=1):
+    """Pack the named images onto an atlas once the first of them is asked
+    for, rather than decoding them now."""
+    for name in names:
+        if (name, True, None) not in _images:
+            _atlases[name] = (names, padding)
+
+def image_size(name):
+    """Return the width and height of the named image, read from the header
+    of a PNG or BMP file without decoding it."""
+    size = _sizes.get(name)
+    if size is not None:
+        return size
+
+    with open(os.path.join(IMAGE_DIR, name), 'rb') as f_obj:
+        header = f_obj.read(26)
+    if header[:8] == b'\x89PNG\r\n\x1a\n':
+        size = struct.unpack_from('>II', header, 16)
+    elif header[:2] == b'BM':
+        # Rows stored top down are given a negative height.
+        width, height = struct.unpack_from('<ii', header, 18)
+        size = (width, abs(height))
+    else:
+        size = load_image(name).get_size()
+    _sizes[name] = size
+    return size
+
+def load_font(size):
+    """Return pygame's default font at the given size, shared by everyone
+    that asks for it. Loaded from the file bundled with pygame, it spares a
+    scan of the system's fonts."""
+    font = _fonts.get(size)
+    if font is None:
+        font = pygame.font.Font(None, size)
+        _fonts[size] = font
+    return font
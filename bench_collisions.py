@@ -0,0 +1,75 @@
+"""Stress benchmark of bullet collision checks.
+
+Times a frames worth of bullet against target checks, pairwise as
+pygame.sprite.groupcollide does them and through the uniform grid, as the
+numbers of bullets and targets grow.
+
+    python bench_collisions.py --repeat 5
+"""
+import argparse
+import time
+
+import numpy as np
+import pygame
+
+from settings import Settings
+from spatial import SpatialGrid
+
+def formation(count, width, height):
+    """Lay out count targets as the fleet is laid out, one target's size
+    between each, return the rects and the size of the field they cover."""
+    columns = int(np.ceil(np.sqrt(count)))
+    rects = [pygame.Rect(2 * width * (i % columns),
+                         2 * height * (i // columns), width, height)
+             for i in range(count)]
+    return rects, (2 * width * columns, 2 * height * (count // columns + 1))
+
+def random_rects(rng, count, width, height, field):
+    """Scatter count rects of the given size about the field."""
+    x = rng.integers(0, field[0] - width, count)
+    y = rng.integers(0, field[1] - height, count)
+    return [pygame.Rect(int(i), int(j), width, height) for i, j in zip(x, y)]
+
+def pairwise(bullets, targets):
+    """Test every bullet against every target."""
+    return [rect.collidelistall(targets) for rect in bullets]
+
+def gridded(bullets, targets, cell_size):
+    """Build the grid of targets and query it with every bullet."""
+    grid = SpatialGrid(cell_size)
+    grid.build_rects(targets)
+    return grid.query_rects(bullets)
+
+def best_time(function, repeat):
+    """Return the fastest of repeat runs of function, in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='runs per case, the fastest is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    settings = Settings()
+    rng = np.random.default_rng(args.seed)
+    print("{:>8} {:>8} {:>12} {:>12} {:>8}".format(
+          'bullets', 'targets', 'pairwise ms', 'grid ms', 'speedup'))
+    for count in (10, 100, 1000, 5000, 20000):
+        targets, field = formation(count, 60, 26)
+        bullets = random_rects(rng, count, settings.bullet_width,
+                               settings.bullet_height, field)
+        slow = best_time(lambda: pairwise(bullets, targets), args.repeat)
+        fast = best_time(lambda: gridded(bullets, targets,
+                                         settings.grid_cell_size),
+                         args.repeat)
+        print("{:>8,} {:>8,} {:>12.3f} {:>12.3f} {:>7.1f}x".format(
+              count, count, slow, fast, slow / fast))
+
+if __name__ == '__main__':
+    main()
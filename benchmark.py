@@ -0,0 +1,245 @@
+"""Seeded scenario benchmarks of the game's update and collision code.
+
+Each scenario sets up a game headlessly, then drives the real
+game_functions update and collision code for a number of frames. The time
+of each phase, the memory allocated and the entity counts are reported.
+Results may be saved as a baseline, later runs are compared against it and
+fail on any regression beyond the tolerance.
+
+    python benchmark.py --save
+    python benchmark.py --scenario rapidfire_storm
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import pygame
+
+from settings import Settings
+from headless import HeadlessGame, ScriptedInput, sweep_script
+from profiler import profiler, entity_counts, PHASES, COUNTS
+
+import game_functions as gf
+
+BASELINE = 'benchmark_baseline.json'
+
+# Phases quicker than this, in milliseconds, are too short to time reliably
+# and are not held to the baseline.
+NOISE_FLOOR = 0.005
+
+def fleet_idle(game):
+    """The full fleet marching with no one firing."""
+    game.settings.alien_fire_rate = 10 ** 9
+    return ScriptedInput()
+
+def rapidfire_storm(game):
+    """The ship sweeping whilst firing wide bullets every frame."""
+    game.settings.rapidfire = True
+    game.settings.widebullets = True
+    return sweep_script(game.frames, fire_every=1, start=False)
+
+def max_fire_rate(game):
+    """The aliens firing as fast as levels of speeding up allow, everything
+    else, the fleet's march included, left at the starting speed so that
+    the bullets stay on screen and the fleet lasts the run."""
+    settings = game.settings
+    rate = None
+    while settings.alien_fire_rate != rate:
+        rate = settings.alien_fire_rate
+        settings.alien_fire_scaling()
+    return sweep_script(game.frames, start=False)
+
+def shields_under_fire(game):
+    """Every alien in the front line firing down onto the shields, the ship
+    firing up into them from beneath."""
+    game.settings.alien_fire_rate = 2
+    game.settings.alien_speed_factor = 0
+    game.settings.rapidfire = True
+    script = ScriptedInput()
+    for frame in range(0, game.frames, 2):
+        script.press(frame, pygame.K_SPACE)
+    return script
+
+SCENARIOS = {
+    'fleet_idle': fleet_idle,
+    'rapidfire_storm': rapidfire_storm,
+    'max_fire_rate': max_fire_rate,
+    'shields_under_fire': shields_under_fire,
+}
+
+
+def start(scenario, frames, seed):
+    """Start a seeded game and set up the scenario."""
+    settings = Settings()
+    settings.seed = seed
+    settings.leaderboard_file = None
+    game = HeadlessGame(settings)
+    game.frames = frames
+    gf.start_game(game.settings, game.stats, game.screen, game.sb,
+                  game.ship, game.fleet, game.bullets, game.blockade)
+    game.input = SCENARIOS[scenario](game)
+    return game
+
+def step(game):
+    """Advance the game a frame, topping up the ships so that the game goes
+    on however often the ship is hit."""
+    game.stats.ships_left = game.settings.ship_limit
+    game.step()
+
+def time_scenario(scenario, frames, seed):
+    """Play the scenario, return its per phase timings and entity
+    counts."""
+    game = start(scenario, frames, seed)
+    profiler.reset(window=frames)
+    profiler.enabled = True
+    totals = dict((name, 0) for name in COUNTS)
+    peaks = dict((name, 0) for name in COUNTS)
+    start_time = time.perf_counter()
+    try:
+        for _ in range(frames):
+            step(game)
+            for name, count in entity_counts(game.fleet, game.bullets,
+                                             game.blockade).items():
+                totals[name] += count
+                peaks[name] = max(peaks[name], count)
+    finally:
+        profiler.enabled = False
+    elapsed = time.perf_counter() - start_time
+
+    phases = {}
+    for name in PHASES:
+        samples = profiler.samples.get(name)
+        # Phases that never ran are filed as taking no time each frame.
+        if samples and any(samples):
+            mean = sum(samples) / frames * 1000
+            phases[name] = {'mean': mean,
+                            'p95': profiler.percentiles(name, (95,))[0]}
+    counts = dict((name, {'mean': totals[name] / frames,
+                          'max': peaks[name]}) for name in COUNTS)
+    return {'fps': frames / elapsed, 'phases': phases, 'counts': counts}
+
+def measure_allocations(scenario, frames, seed):
+    """Play the scenario again under tracemalloc, return the peak memory
+    allocated during play and that still held at its end, in KiB."""
+    game = start(scenario, frames, seed)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(frames):
+            step(game)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'peak_kib': (peak - before) / 1024,
+            'retained_kib': (current - before) / 1024}
+
+def run_scenario(scenario, frames, seed, repeat):
+    """Time the scenario repeat times keeping the quickest time of each
+    phase, then measure its allocations."""
+    result = None
+    for _ in range(repeat):
+        run = time_scenario(scenario, frames, seed)
+        if result is None:
+            result = run
+            continue
+        result['fps'] = max(result['fps'], run['fps'])
+        for name, timing in run['phases'].items():
+            best = result['phases'].setdefault(name, timing)
+            best['mean'] = min(best['mean'], timing['mean'])
+            best['p95'] = min(best['p95'], timing['p95'])
+    result['allocations'] = measure_allocations(scenario, frames, seed)
+    return result
+
+def print_result(scenario, result):
+    """Print a scenario's timings, allocations and entity counts."""
+    print("\n{} at {:,.0f} fps".format(scenario, result['fps']))
+    print("{:<34}{:>10}{:>10}".format('phase ms', 'mean', 'p95'))
+    for name in PHASES:
+        if name in result['phases']:
+            timing = result['phases'][name]
+            print("{:<34}{:>10.4f}{:>10.4f}".format(name, timing['mean'],
+                                                    timing['p95']))
+    print("allocated {peak_kib:,.1f} KiB at peak, {retained_kib:,.1f} KiB "
+          "retained".format(**result['allocations']))
+    print(", ".join("{} {:,.1f} mean {:,} max".format(name, count['mean'],
+                                                       count['max'])
+                    for name, count in result['counts'].items()))
+
+def regressions(results, baseline, tolerance):
+    """Return descriptions of what has slowed or grown beyond tolerance of
+    the baseline."""
+    found = []
+    for scenario, result in results.items():
+        if scenario not in baseline:
+            continue
+        base = baseline[scenario]
+        for name, timing in result['phases'].items():
+            was = base['phases'].get(name, {}).get('mean')
+            if was is None or max(was, timing['mean']) < NOISE_FLOOR:
+                continue
+            if timing['mean'] > max(was, NOISE_FLOOR) * (1 + tolerance):
+                found.append("{} {}: {:.4f} ms, was {:.4f} ms".format(
+                             scenario, name, timing['mean'], was))
+        was = base['allocations']['peak_kib']
+        now = result['allocations']['peak_kib']
+        if now > max(was, 1.0) * (1 + tolerance):
+            found.append("{} allocations: {:,.1f} KiB at peak, was {:,.1f} "
+                         "KiB".format(scenario, now, was))
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', action='append',
+                        choices=sorted(SCENARIOS),
+                        help='scenario to run, all by default')
+    parser.add_argument('--frames', type=int, default=2000,
+                        help='frames played per scenario')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed runs per scenario, the quickest is kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE,
+                        help='baseline file to compare against or save to')
+    parser.add_argument('--save', action='store_true',
+                        help='save the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='slow down allowed against the baseline')
+    args = parser.parse_args()
+
+    results = {}
+    for scenario in args.scenario or SCENARIOS:
+        results[scenario] = run_scenario(scenario, args.frames, args.seed,
+                                         args.repeat)
+        print_result(scenario, results[scenario])
+
+    if args.save:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f_obj:
+                baseline = json.load(f_obj)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f_obj:
+            json.dump(baseline, f_obj, indent=2, sort_keys=True)
+        print("\nSaved the baseline to {}.".format(args.baseline))
+        return
+
+    # Without a baseline nothing can be checked, which is a failure rather
+    # than a pass.
+    if not os.path.exists(args.baseline):
+        print("\nNo baseline at {}, run with --save to make one.".format(
+              args.baseline))
+        sys.exit(1)
+    with open(args.baseline) as f_obj:
+        baseline = json.load(f_obj)
+    found = regressions(results, baseline, args.tolerance)
+    if found:
+        print("\nRegressions against {}:".format(args.baseline))
+        for regression in found:
+            print("  " + regression)
+        sys.exit(1)
+    print("\nNo regressions against {}.".format(args.baseline))
+
+if __name__ == '__main__':
+    main()
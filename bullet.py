@@ -1,63 +1,182 @@
+import numpy as np
 import pygame
-from pygame.sprite import Sprite
 
+from spatial import SpatialGrid
 
-class Bullet(Sprite):
-    """A class to manage bullets fired from the ship."""
 
-    def __init__(self, settings, screen, vehicule):
-        """Create a bullet object at the ships current position."""
-        super(Bullet, self).__init__()
+class BulletPool():
+    """A preallocated pool of bullets with positions, sizes and velocities
+    held in arrays. Live bullets are packed at the front of the arrays, a shot
+    takes the next free slot and removed bullets are compacted away, so
+    firing allocates nothing and the whole pool moves in one operation."""
+
+    def __init__(self, settings, screen, direction, colour, capacity):
+        self.settings = settings
         self.screen = screen
 
-        if settings.widebullets == True:
-            bullet_width = 100 * settings.bullet_width
+        # The owner of the pool, -1 the ship firing up, 1 the aliens firing
+        # down.
+        self.direction = direction
+        self.colour = colour
+        self.capacity = capacity
+
+        self.x = np.zeros(capacity, dtype=int)
+        self.y = np.zeros(capacity)
+        self.width = np.zeros(capacity, dtype=int)
+        self.height = np.zeros(capacity, dtype=int)
+        self.speed = np.zeros(capacity)
+        self.count = 0
+
+        # Collision grid of the live bullets, rebuilt after they move.
+        self.spatial_grid = SpatialGrid(settings.grid_cell_size)
+        self.grid_stale = True
+
+    def __len__(self):
+        return self.count
+
+    def bullet_size(self):
+        """Return the size of a new bullet under the current settings."""
+        if self.settings.widebullets == True:
+            width = 100 * self.settings.bullet_width
         else:
-            bullet_width = settings.bullet_width
-
-        # Create a bullet rect at (0, 0).
-        self.rect = pygame.Rect(0, 0, bullet_width, settings.bullet_height)
-
-        self.colour = settings.bullet_colour
-        self.speed_factor = settings.bullet_speed_factor
+            width = self.settings.bullet_width
+        return width, self.settings.bullet_height
+
+    def spawn(self, centerx, top):
+        """Fire a bullet centred on centerx from top, return false if the
+        pool is full."""
+        if self.count == self.capacity:
+            return False
+        i = self.count
+        width, height = self.bullet_size()
+        self.x[i] = centerx - width // 2
+        self.y[i] = top
+        self.width[i] = width
+        self.height[i] = height
+        self.speed[i] = (self.settings.per_tick(
+                self.settings.bullet_speed_factor) * self.direction)
+        self.count += 1
+        self.grid_stale = True
+        return True
+
+    def spawn_many(self, centerx, top):
+        """Fire a bullet from each of the given positions, as far as the pool
+        has room, return the number fired."""
+        number = min(len(centerx), self.capacity - self.count)
+        if not number:
+            return 0
+        live = slice(self.count, self.count + number)
+        width, height = self.bullet_size()
+        self.x[live] = np.asarray(centerx[:number]) - width // 2
+        self.y[live] = top[:number]
+        self.width[live] = width
+        self.height[live] = height
+        self.speed[live] = (self.settings.per_tick(
+                self.settings.bullet_speed_factor) * self.direction)
+        self.count += number
+        self.grid_stale = True
+        return number
+
+    def edges(self, alpha=1.0):
+        """Return the left, top, right and bottom edges of the live bullets,
+        as their rects would hold them. An alpha below 1 gives the edges that
+        fraction of the way from the previous tick to the current one."""
+        n = self.count
+        left = self.x[:n]
+        if alpha == 1.0:
+            top = self.y[:n].astype(int)
+        else:
+            top = (self.y[:n] + (alpha - 1) * self.speed[:n]).astype(int)
+        return left, top, left + self.width[:n], top + self.height[:n]
 
     def update(self):
-        """Move the bullet."""
-        # Update the decimal position of the bullet.
-        self.y += self.speed_factor * self.direction
-        # Update the rect position.
-        self.rect.y = self.y
-
-    def draw_bullet(self):
-        """Draw the bullet to the screen."""
-        pygame.draw.rect(self.screen, self.colour, self.rect)
-
-
-class FriendlyBullet(Bullet):
-    """Bullet from the players ship."""
-    def __init__(self, settings, screen, ship):
-        super(FriendlyBullet, self).__init__(settings, screen, ship)
-        # Set the bullets starting position.
-        self.rect.centerx = ship.rect.centerx
-        self.rect.top = ship.rect.top
-
-        # Store the bullets position as a decimal value.
-        self.y = float(self.rect.y)
-
-        self.direction = -1
-
-
-class AlienBullet(Bullet):
-    """Bullet from an alien."""
-    def __init__(self, settings, screen, alien):
-        super(AlienBullet, self).__init__(settings, screen, alien)
-        # Set the bullets starting position.
-        self.rect.centerx = alien.rect.centerx
-        self.rect.top = alien.rect.bottom
-
-        # Store the bullets position as a decimal value.
-        self.y = float(self.rect.y)
-
-        self.direction = 1
-        self.colour = settings.alien_bullet_colour
+        """Move every bullet."""
+        self.y[:self.count] += self.speed[:self.count]
+        self.grid_stale = True
+
+    def cull(self, screen_height):
+        """Remove the bullets that have left the screen."""
+        _, top, _, bottom = self.edges()
+        gone = (bottom <= 0) | (top >= screen_height)
+        if gone.any():
+            self.compact(~gone)
+
+    def remove(self, index):
+        """Remove the bullets at the given indices."""
+        keep = np.ones(self.count, dtype=bool)
+        keep[index] = False
+        self.compact(keep)
+
+    def compact(self, keep):
+        """Pack the bullets flagged in keep to the front of the pool."""
+        n = self.count
+        live = int(np.count_nonzero(keep))
+        for array in (self.x, self.y, self.width, self.height, self.speed):
+            array[:live] = array[:n][keep]
+        self.count = live
+        self.grid_stale = True
+
+    def empty(self):
+        """Remove every bullet."""
+        self.count = 0
+        self.grid_stale = True
+
+    def grid(self):
+        """Return the collision grid of the live bullets."""
+        if self.grid_stale:
+            self.spatial_grid.build(*self.edges())
+            self.grid_stale = False
+        return self.spatial_grid
+
+    def rects(self, alpha=1.0):
+        """Return the rects of the live bullets, as tuples."""
+        left, top, right, bottom = self.edges(alpha)
+        return list(zip(left.tolist(), top.tolist(), (right - left).tolist(),
+                        (bottom - top).tolist()))
+
+    def draw(self, surface, alpha=1.0):
+        """Draw the bullets to the surface, return their rects."""
+        rects = self.rects(alpha)
+        colour = self.colour
+        for rect in rects:
+            # Unlike fill, draw.rect clips a rect overhanging the top.
+            pygame.draw.rect(surface, colour, rect)
+        return rects
+
+
+class Bullets():
+    """The bullets in play, the ships and the aliens each kept in their own
+    pool so that neither has to be sifted out of the other."""
+    def __init__(self, settings, screen):
+        self.friendly = BulletPool(settings, screen, -1,
+                                   settings.bullet_colour,
+                                   settings.bullet_capacity)
+        self.alien = BulletPool(settings, screen, 1,
+                                settings.alien_bullet_colour,
+                                settings.bullet_capacity)
+
+    def __len__(self):
+        return len(self.friendly) + len(self.alien)
+
+    def pools(self):
+        """Return both pools of bullets."""
+        return self.friendly, self.alien
 
+    def update(self):
+        """Move every bullet."""
+        self.friendly.update()
+        self.alien.update()
+
+    def empty(self):
+        """Remove every bullet."""
+        self.friendly.empty()
+        self.alien.empty()
+
+    def rects(self, alpha=1.0):
+        """Return the rects of every bullet, as tuples."""
+        return self.friendly.rects(alpha) + self.alien.rects(alpha)
+
+    def draw(self, surface, alpha=1.0):
+        """Draw every bullet, return their rects."""
+        return (self.friendly.draw(surface, alpha) +
+                self.alien.draw(surface, alpha))
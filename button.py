@@ -1,5 +1,7 @@
 import pygame
 
+import assets
+
 class Button():
     """Button class to impliment the start button."""
     def __init__(self, settings, screen, msg):
@@ -10,7 +12,7 @@ class Button():
         self.width, self.height = 200, 50
         self.button_colour = 0, 255, 0
         self.text_colour = 255, 255, 255
-        self.font = pygame.font.SysFont(None, 48)
+        self.font = assets.load_font(48)
 
         # Build the buttons rect object and center it.
         self.rect = pygame.Rect(0, 0, self.width, self.height)
@@ -0,0 +1,108 @@
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pygame
+
+
+class FrameCapture():
+    """Record the frames drawn to the screen. Each frame is read through a
+    view of the screen's pixels straight into a slot of a ring buffer made
+    ahead of time, and written to file by a background thread. A frame
+    arriving with no free slot is dropped rather than holding up the
+    game."""
+
+    def __init__(self, settings, screen):
+        self.screen = screen
+        self.directory = settings.capture_dir
+        self.format = settings.capture_format
+        self.stride = max(1, settings.capture_stride)
+        os.makedirs(self.directory, exist_ok=True)
+
+        # The ring buffer, in rows of pixels as the screen holds them. A 32
+        # bit screen is copied whole pixels at a time and split into colours
+        # by the writer, any other a colour at a time.
+        width, height = screen.get_size()
+        self.size = (-(-width // self.stride), -(-height // self.stride))
+        self.packed = screen.get_bitsize() == 32
+        if self.packed:
+            shape, dtype = self.size[::-1], np.uint32
+            self.shifts = screen.get_shifts()[:3]
+        else:
+            shape, dtype = self.size[::-1] + (3,), np.uint8
+        self.ring = np.zeros((settings.capture_buffer,) + shape, dtype=dtype)
+        self.free = queue.Queue()
+        for slot in range(settings.capture_buffer):
+            self.free.put(slot)
+        self.ready = queue.Queue()
+
+        # Frames offered, written and dropped, and time spent capturing.
+        self.frames = 0
+        self.written = 0
+        self.dropped = 0
+        self.capture_time = 0.0
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def capture(self):
+        """Copy the screen into a free slot for writing, call once the
+        frame is drawn."""
+        start = time.perf_counter()
+        self.frames += 1
+        try:
+            slot = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+        else:
+            # The view locks the screen, it must go before the next blit.
+            if self.packed:
+                pixels = pygame.surfarray.pixels2d(self.screen).T
+            else:
+                pixels = pygame.surfarray.pixels3d(self.screen).swapaxes(0, 1)
+            np.copyto(self.ring[slot], pixels[::self.stride, ::self.stride])
+            del pixels
+            self.ready.put((slot, self.frames))
+        self.capture_time += time.perf_counter() - start
+
+    def run(self):
+        """Write out frames as they become ready, until handed None."""
+        while True:
+            item = self.ready.get()
+            if item is None:
+                return
+            slot, number = item
+            self.write(self.ring[slot], number)
+            self.written += 1
+            self.free.put(slot)
+
+    def write(self, frame, number):
+        """Write a frame to file, as PNG or as raw RGB rows."""
+        if self.packed:
+            frame = np.dstack([(frame >> shift).astype(np.uint8)
+                               for shift in self.shifts])
+        data = np.ascontiguousarray(frame).tobytes()
+        path = os.path.join(self.directory, "frame_{:06d}".format(number))
+        if self.format == 'png':
+            pygame.image.save(pygame.image.frombuffer(data, self.size, 'RGB'),
+                              path + '.png')
+        else:
+            with open(path + '.rgb', 'wb') as file_object:
+                file_object.write(data)
+
+    def close(self):
+        """Write out the frames still held and stop the writer."""
+        self.ready.put(None)
+        self.thread.join()
+
+    def report(self):
+        """Describe the frames captured and the time it cost the game."""
+        if not self.frames:
+            return "No frames captured."
+        width, height = self.size
+        return ("Captured {:,} of {:,} frames at {}x{} to {}, {:,} dropped, "
+                "{:.3f} ms a frame on the game loop.".format(
+                self.written, self.frames, width, height, self.directory,
+                self.dropped, self.capture_time / self.frames * 1000))
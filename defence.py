@@ -1,11 +1,96 @@
-class Defence():
-    """Blockade to stop the aliens."""
-    def __init__(self, settings, screen):
-        self.settings = settings
+import numpy as np
+import pygame
+from pygame.sprite import Sprite
+
+class Defence(Sprite):
+    """Shield, part of the defence barricade. The shield is a single surface
+    with a grid of cells recording which parts of it still stand, hits erode
+    the cells and the surface in place."""
+
+    def __init__(self, settings, screen, rows, x, y):
+        super(Defence, self).__init__()
         self.screen = screen
+        self.settings = settings
+
+        # Split each block of the pattern into resolution squared cells,
+        # which must be whole pixels for the shield to keep its size.
+        resolution = settings.shield_resolution
+        if (settings.block_width % resolution or
+                settings.block_height % resolution):
+            raise ValueError("shield_resolution {} does not divide the {}x{} "
+                             "block.".format(resolution,
+                                             settings.block_width,
+                                             settings.block_height))
+        self.cells = np.kron(np.array(rows, dtype=bool),
+                             np.ones((resolution, resolution), dtype=bool))
+        self.cell_width = settings.block_width // resolution
+        self.cell_height = settings.block_height // resolution
+        cell_rows, cell_columns = self.cells.shape
+
+        # Create the shield surface at x, y.
+        self.rect = pygame.Rect(x, y, cell_columns * self.cell_width,
+                                cell_rows * self.cell_height)
+        self.image = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        self.image.fill((0, 0, 0, 0))
+        self.colour = settings.blockade_colour
+        self.standing = int(np.count_nonzero(self.cells))
+        for i, j in zip(*np.nonzero(self.cells)):
+            self.image.fill(self.colour,
+                            (j * self.cell_width, i * self.cell_height,
+                             self.cell_width, self.cell_height))
+
+    def restore(self, cells):
+        """Set which cells stand, redrawing the shield to match."""
+        if np.array_equal(cells, self.cells):
+            return
+        self.cells[:] = cells
+        self.standing = int(np.count_nonzero(self.cells))
+
+        # Draw the standing cells through the surface's pixel arrays, which
+        # are indexed by column then row.
+        mask = np.kron(self.cells, np.ones((self.cell_height,
+                                            self.cell_width),
+                                           dtype=bool)).T
+        self.image.fill((0, 0, 0, 0))
+        pixels = pygame.surfarray.pixels3d(self.image)
+        pixels[mask] = self.colour[:3]
+        del pixels
+        alpha = pygame.surfarray.pixels_alpha(self.image)
+        alpha[mask] = self.colour[3] if len(self.colour) > 3 else 255
+        del alpha
+
+    def cell_span(self, rect):
+        """Return the row and column slices of the cells overlapping rect."""
+        left = max(0, (rect.left - self.rect.x) // self.cell_width)
+        right = -((self.rect.x - rect.right) // self.cell_width)
+        top = max(0, (rect.top - self.rect.y) // self.cell_height)
+        bottom = -((self.rect.y - rect.bottom) // self.cell_height)
+        return slice(top, bottom), slice(left, right)
 
-        # Create a rectamgle as the basic defence.
-        self.rect = pygame.Rect(0, 0, 15, 9)
+    def collide_rect(self, rect):
+        """Return true if rect overlaps any standing part of the shield."""
+        if not self.rect.colliderect(rect):
+            return False
+        return bool(self.cells[self.cell_span(rect)].any())
 
-        self.colour = (80, 50, 50)
+    def hit(self, rect):
+        """Erode the cells overlapping rect, return true if any stood."""
+        if not self.rect.colliderect(rect):
+            return False
+        rows, columns = self.cell_span(rect)
+        region = self.cells[rows, columns]
+        eroded = int(np.count_nonzero(region))
+        if not eroded:
+            return False
+        region[:] = False
+        self.standing -= eroded
 
+        # Clear the eroded cells from the surface.
+        top, left = rows.start, columns.start
+        height, width = region.shape
+        self.image.fill((0, 0, 0, 0),
+                        (left * self.cell_width, top * self.cell_height,
+                         width * self.cell_width, height * self.cell_height))
+        if not self.standing:
+            self.kill()
+        return True
@@ -0,0 +1,366 @@
+import math
+
+import numpy as np
+import pygame
+
+import assets
+from spatial import SpatialGrid
+
+class Fleet():
+    """The alien fleet, stored as arrays with one entry per alien. The fleet
+    moves in lockstep, so each alien is held as an offset within the
+    formation and only the formation's origin moves."""
+
+    def __init__(self, settings, screen):
+        self.screen = screen
+        self.settings = settings
+
+        # The size of the alien image, shared by every alien in the fleet,
+        # which is not decoded until the fleet is first drawn.
+        self.width, self.height = assets.image_size('alien.png')
+        self.rect = pygame.Rect(0, 0, self.width, self.height)
+
+        # Fleet arrays, aliens are ordered column by column from the top row,
+        # and the origin the offsets are measured from.
+        self.columns = 0
+        self.rows = 0
+        self.offset_x = np.zeros(0, dtype=int)
+        self.offset_y = np.zeros(0, dtype=int)
+        self.origin_x = 0.0
+        self.origin_y = 0.0
+        self.row = np.zeros(0, dtype=int)
+        self.column = np.zeros(0, dtype=int)
+        self.alive = np.zeros(0, dtype=bool)
+        self.count = 0
+
+        # The front line, the lowest living row of each column or -1, and the
+        # aliens in it packed at the head of shooter_index, each column's
+        # place there being held in shooter_slot.
+        self.front_row = np.zeros(0, dtype=int)
+        self.shooter_index = np.zeros(0, dtype=int)
+        self.shooter_slot = np.zeros(0, dtype=int)
+        self.shooter_count = 0
+
+        # The highest living row of each column, and an alien on each edge
+        # of the fleet. The fleet moves as one, so these aliens give its
+        # bounds wherever it is.
+        self.back_row = np.zeros(0, dtype=int)
+        self.left_alien = 0
+        self.right_alien = 0
+        self.top_alien = 0
+        self.bottom_alien = 0
+
+        # How far the fleet moved on the last tick, to draw between ticks.
+        self.step_x = 0.0
+        self.step_y = 0.0
+
+        # Collision grid of the living aliens within the formation, and the
+        # living aliens drawn onto a single surface, both rebuilt only when
+        # aliens are killed.
+        self.spatial_grid = SpatialGrid(settings.grid_cell_size)
+        self.grid_index = np.zeros(0, dtype=int)
+        self.grid_stale = True
+        self.composite = None
+        self.composite_offset = (0, 0)
+
+        # Ticks until the front line next fires, and the fire rate and size
+        # of front line the wait was drawn for.
+        self.fire_countdown = 0
+        self.fire_odds = None
+
+    def __len__(self):
+        """Number of aliens left alive."""
+        return self.count
+
+    def create(self, columns, rows):
+        """Fill the formation with aliens, one aliens width between each."""
+        self.columns = columns
+        self.rows = rows
+        column, row = np.meshgrid(np.arange(columns), np.arange(rows),
+                                  indexing='ij')
+        self.column = column.ravel()
+        self.row = row.ravel()
+        self.offset_x = (self.width + 2 * self.width * self.column +
+                         self.settings.shim_x).astype(int)
+        self.offset_y = (self.height + 2 * self.height * self.row +
+                         self.settings.shim_y).astype(int)
+        self.origin_x = 0.0
+        self.origin_y = 0.0
+        self.alive = np.ones(columns * rows, dtype=bool)
+        self.count = columns * rows
+        self.step_x = 0.0
+        self.step_y = 0.0
+        self.fire_countdown = 0
+        self.fire_odds = None
+        self.grid_stale = True
+        self.composite = None
+        self.define_frontline()
+
+    def restore(self, columns, rows, alive, shooters):
+        """Set which aliens of a columns by rows formation are alive, and
+        the order of the front line, as the fleet stood when saved."""
+        if (columns, rows) != (self.columns, self.rows):
+            self.create(columns, rows)
+        self.alive[:] = alive
+        self.count = int(np.count_nonzero(self.alive))
+        self.grid_stale = True
+        self.composite = None
+        self.define_frontline()
+        # The front line is ordered by the kills made, not by column.
+        self.shooter_count = len(shooters)
+        self.shooter_index[:self.shooter_count] = shooters
+        self.shooter_slot[self.column[shooters]] = np.arange(
+                self.shooter_count)
+
+    def empty(self):
+        """Remove all aliens."""
+        self.alive[:] = False
+        self.front_row[:] = -1
+        self.back_row[:] = -1
+        self.shooter_slot[:] = -1
+        self.shooter_count = 0
+        self.count = 0
+        self.grid_stale = True
+        self.composite = None
+
+    def kill(self, index):
+        """Remove the aliens at the given indices."""
+        self.alive[index] = False
+        self.count = int(np.count_nonzero(self.alive))
+        self.grid_stale = True
+        self.composite = None
+        self.update_frontline(np.unique(self.column[index]).tolist())
+
+    def update(self):
+        """Move the fleet right or left."""
+        self.step_x = (self.settings.per_tick(
+                self.settings.alien_speed_factor) *
+                self.settings.fleet_direction)
+        self.step_y = 0.0
+        self.origin_x += self.step_x
+
+    def drop(self):
+        """Move the whole fleet down a step."""
+        self.origin_y += self.settings.fleet_drop_speed
+        self.step_y += self.settings.fleet_drop_speed
+
+    def origin(self, alpha=1.0):
+        """Return the integer origin of the formation, alpha of the way from
+        the previous tick to the current one."""
+        return (math.floor(self.origin_x + (alpha - 1) * self.step_x),
+                math.floor(self.origin_y + (alpha - 1) * self.step_y))
+
+    def positions(self, index=slice(None)):
+        """Return the integer screen positions of the aliens, or of those
+        at the given indices, as a rect would hold them."""
+        x, y = self.origin()
+        return self.offset_x[index] + x, self.offset_y[index] + y
+
+    def check_edges(self):
+        """Return true if any alien is at an edge of the screen."""
+        if not self.count:
+            return False
+        x, _ = self.origin()
+        return (int(self.offset_x[self.right_alien]) + x + self.width >=
+                self.screen.get_rect().right or
+                int(self.offset_x[self.left_alien]) + x <= 0)
+
+    def bottom(self):
+        """Return the bottom edge of the lowest alien."""
+        _, y = self.origin()
+        return int(self.offset_y[self.bottom_alien]) + y + self.height
+
+    def check_bottom(self, bottom):
+        """Return true if any alien has reached the given height."""
+        return bool(self.count) and self.bottom() >= bottom
+
+    def define_frontline(self):
+        """Find the lowermost living alien in each column afresh, these
+        aliens are the ones that fire back."""
+        rows = np.where(self.alive, self.row, -1)
+        self.front_row = rows.reshape(self.columns, self.rows).max(axis=1)
+        rows = np.where(self.alive, self.row, self.rows)
+        self.back_row = rows.reshape(self.columns, self.rows).min(axis=1)
+        self.back_row[self.back_row == self.rows] = -1
+        columns = np.flatnonzero(self.front_row >= 0)
+        self.shooter_count = columns.size
+        self.shooter_index = np.zeros(self.columns, dtype=int)
+        self.shooter_index[:columns.size] = (columns * self.rows +
+                                             self.front_row[columns])
+        self.shooter_slot = np.full(self.columns, -1)
+        self.shooter_slot[columns] = np.arange(columns.size)
+        self.update_extents()
+
+    def update_frontline(self, columns):
+        """Move the front and back of the given columns past any aliens
+        killed in them, dropping columns left empty."""
+        for column in columns:
+            front = self.front_row[column]
+            back = self.back_row[column]
+            first = column * self.rows
+            if front < 0:
+                continue
+            if not self.alive[first + back]:
+                standing = np.flatnonzero(self.alive[first + back:
+                                                     first + front + 1])
+                if standing.size:
+                    back += standing[0]
+                    self.back_row[column] = back
+            if self.alive[first + front]:
+                continue
+            standing = np.flatnonzero(self.alive[first + back:first + front])
+            if standing.size:
+                self.front_row[column] = back + standing[-1]
+                self.shooter_index[self.shooter_slot[column]] = (
+                        first + back + standing[-1])
+                continue
+
+            # Empty, move the last shooter into the column's place.
+            self.front_row[column] = -1
+            slot = self.shooter_slot[column]
+            self.shooter_count -= 1
+            moved = self.shooter_index[self.shooter_count]
+            self.shooter_index[slot] = moved
+            self.shooter_slot[self.column[moved]] = slot
+            self.shooter_slot[column] = -1
+            self.back_row[column] = -1
+        self.update_extents()
+
+    def update_extents(self):
+        """Find the aliens on the edges of the fleet from the extents of
+        its columns."""
+        columns = np.flatnonzero(self.front_row >= 0)
+        if not columns.size:
+            return
+        left, right = columns[0], columns[-1]
+        self.left_alien = int(left * self.rows + self.front_row[left])
+        self.right_alien = int(right * self.rows + self.front_row[right])
+        bottom = columns[np.argmax(self.front_row[columns])]
+        self.bottom_alien = int(bottom * self.rows + self.front_row[bottom])
+        top = columns[np.argmin(self.back_row[columns])]
+        self.top_alien = int(top * self.rows + self.back_row[top])
+
+    def shooters(self):
+        """Return the indices of the aliens in the front line."""
+        return self.shooter_index[:self.shooter_count]
+
+    def formation_rect(self):
+        """Return a rect enclosing every living alien within the
+        formation."""
+        left = int(self.offset_x[self.left_alien])
+        top = int(self.offset_y[self.top_alien])
+        return pygame.Rect(left, top,
+                           int(self.offset_x[self.right_alien]) +
+                           self.width - left,
+                           int(self.offset_y[self.bottom_alien]) +
+                           self.height - top)
+
+    def bounding_rect(self, alpha=1.0):
+        """Return a rect enclosing every living alien, as drawn."""
+        if not self.count:
+            return pygame.Rect(0, 0, 0, 0)
+        return self.formation_rect().move(self.origin(alpha))
+
+    def grid(self):
+        """Return the collision grid of the living aliens, within the
+        formation."""
+        if self.grid_stale:
+            self.grid_index = np.flatnonzero(self.alive)
+            x = self.offset_x[self.grid_index]
+            y = self.offset_y[self.grid_index]
+            self.spatial_grid.build(x, y, x + self.width, y + self.height)
+            self.grid_stale = False
+        return self.spatial_grid
+
+    def collide_rect(self, rect):
+        """Return the indices of the living aliens overlapping rect."""
+        x, y = self.origin()
+        # The grid first, its index may be rebuilt with it.
+        grid = self.grid()
+        hit = np.sort(self.grid_index[grid.query(rect.move(-x, -y))])
+        return hit[self.alive[hit]]
+
+    def collide_bullets(self, pool, dokill):
+        """Kill the aliens hit by bullets in the pool, as groupcollide would
+        for each column in turn, return a dict of bullet index to list of
+        columns hit. If dokill is set each bullet is removed on hitting its
+        first column."""
+        collisions = {}
+        killed = set()
+        x, y = self.origin()
+        left, top, right, bottom = pool.edges()
+        query, item = self.grid().query_many(left - x, top - y, right - x,
+                                             bottom - y)
+        if not query.size:
+            return collisions
+
+        # Pairs come ordered by bullet, take each bullets run of aliens.
+        item = self.grid_index[item]
+        bullet_index, start = np.unique(query, return_index=True)
+        end = np.append(start[1:], query.size)
+        for index, first, last in zip(bullet_index.tolist(), start.tolist(),
+                                      end.tolist()):
+            hit = np.sort(item[first:last])
+            # An earlier bullet may have taken the alien already.
+            hit = hit[self.alive[hit]]
+            if not hit.size:
+                continue
+            columns = np.unique(self.column[hit])
+            if dokill:
+                columns = columns[:1]
+                hit = hit[self.column[hit] == columns[0]]
+            self.alive[hit] = False
+            collisions[index] = columns.tolist()
+            killed.update(collisions[index])
+        if dokill and collisions:
+            pool.remove(list(collisions))
+        if collisions:
+            self.count = int(np.count_nonzero(self.alive))
+            self.grid_stale = True
+            self.composite = None
+            self.update_frontline(killed)
+        return collisions
+
+    def column_counts(self):
+        """Return the number of living aliens in each column."""
+        return np.bincount(self.column[self.alive], minlength=self.columns)
+
+    def alien_rect(self, index):
+        """Return a rect for the alien at index."""
+        x, y = self.origin()
+        return pygame.Rect(int(self.offset_x[index]) + x,
+                           int(self.offset_y[index]) + y,
+                           self.width, self.height)
+
+    @property
+    def image(self):
+        """The alien image."""
+        return assets.load_image('alien.png')
+
+    def build_composite(self):
+        """Draw the living aliens onto a surface the size of the formation
+        they fill. The aliens never overlap, so each is added onto the clear
+        surface to copy it exactly, alpha and all."""
+        rect = self.formation_rect()
+        self.composite = pygame.Surface(rect.size, pygame.SRCALPHA)
+        self.composite = self.composite.convert_alpha()
+        self.composite.fill((0, 0, 0, 0))
+        self.composite_offset = rect.topleft
+        index = np.flatnonzero(self.alive)
+        x = (self.offset_x[index] - rect.left).tolist()
+        y = (self.offset_y[index] - rect.top).tolist()
+        image = self.image
+        self.composite.blits([(image, position, None, pygame.BLEND_RGBA_ADD)
+                              for position in zip(x, y)], False)
+        # Run length encoded, the blit skips the clear gaps between aliens.
+        self.composite.set_alpha(255, pygame.RLEACCEL)
+
+    def draw(self, surface, alpha=1.0):
+        """Draw every living alien in a single blit."""
+        if not self.count:
+            return
+        if self.composite is None:
+            self.build_composite()
+        x, y = self.origin(alpha)
+        surface.blit(self.composite, (self.composite_offset[0] + x,
+                                      self.composite_offset[1] + y))
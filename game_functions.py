@@ -1,36 +1,37 @@
 """The games principle procedural functions file."""
 import sys
+import numpy as np
 import pygame
-from pygame.sprite import Group
-from random import randint
-from time import sleep
 
-from bullet import FriendlyBullet, AlienBullet
-from alien import Alien
-from block import Block
+from defence import Defence
+from profiler import profiler
+import assets
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Events
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-def check_events(settings, stats, screen, sb, ship, alien_groups, bullets,
-        blockade, play_button):
-    """Respond to key presses and mouse events."""
-    for event in pygame.event.get():
+def check_events(settings, stats, screen, sb, ship, fleet, bullets,
+        blockade, play_button, events=None):
+    """Respond to key presses and mouse events, events may be supplied by a
+    scripted input source in place of the pygame event queue."""
+    if events is None:
+        events = pygame.event.get()
+    for event in events:
         if event.type == pygame.QUIT:
             sys.exit()
         elif event.type == pygame.KEYDOWN:
             check_keydown_events(event, settings, stats, screen, sb, ship,
-                    alien_groups, bullets, blockade)
+                    fleet, bullets, blockade)
         elif event.type == pygame.KEYUP:
             check_keyup_events(event, settings, ship)
         elif event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_x, mouse_y = pygame.mouse.get_pos()
+            mouse_x, mouse_y = event.pos
             check_play_button(settings, stats, screen, sb, play_button, ship,
-                              alien_groups, bullets, blockade, mouse_x, mouse_y)
+                              fleet, bullets, blockade, mouse_x, mouse_y)
 
 def check_keydown_events(event, settings, stats, screen, sb, ship,
-        alien_groups, bullets, blockade):
+        fleet, bullets, blockade):
     """Respond to keypress events."""
     if event.key == pygame.K_LEFT:
         ship.moving_left = True
@@ -47,8 +48,10 @@ def check_keydown_events(event, settings, stats, screen, sb, ship,
     if event.key == pygame.K_w:
         settings.widebullets = not settings.widebullets
     if event.key == pygame.K_p:
-        start_game(settings, stats, screen, sb, ship, alien_groups, bullets,
+        start_game(settings, stats, screen, sb, ship, fleet, bullets,
                        blockade)
+    if event.key == pygame.K_F3:
+        profiler.toggle_overlay()
 
 def check_keyup_events(event, settings, ship):
     """Respond to key up event."""
@@ -61,56 +64,71 @@ def check_keyup_events(event, settings, ship):
 #  Update
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-def update_screen(settings, stats, screen, sb, ship, alien_groups, bullets,
-                      blockade, play_button):
-    """Update objects and flip the new screen."""
+def update_screen(settings, stats, screen, sb, ship, fleet, bullets,
+                      blockade, play_button, renderer=None, alpha=1.0):
+    """Update objects and flip the new screen, or with a dirty rectangle
+    renderer redraw and push only what has changed. Moving objects are drawn
+    alpha of the way from their previous tick to their current one."""
+    if renderer is not None:
+        renderer.draw(stats, sb, ship, fleet, bullets, blockade, play_button,
+                      alpha)
+        return
     # Redraw the screen during each pass through the loop.
     #screen.fill(settings.bg_colour)
-    screen.blit(settings.bg_image, (0,0))
+    screen.blit(assets.load_image(settings.bg_image, False,
+                                  (settings.screen_width,
+                                   settings.screen_height)), (0,0))
     # Draw bullets.
-    for bullet in bullets.sprites():
-        bullet.draw_bullet()
+    bullets.draw(screen, alpha)
     # Draw the ship.
-    ship.blitme()
+    ship.blitme(alpha)
     # Draw aliens.
-    for alien_column in alien_groups:
-        alien_column.draw(screen)
+    fleet.draw(screen, alpha)
     # Draw the defence.
-    for block in blockade:
-        block.draw_block()
+    blockade.draw(screen)
     # Draw the score information.
     sb.show_score()
     # Draw the play button if the game is inactive.
     if not stats.game_active:
         play_button.draw_button()
+    # Draw the profiler's timings if shown.
+    if profiler.show_overlay:
+        screen.blit(profiler.overlay(), settings.profiler_overlay_position)
     # Make the most recently drawn screen visible.
     pygame.display.flip()
 
 def check_play_button(settings, stats, screen, sb, play_button, ship,
-                    alien_groups, bullets, blockade, mouse_x, mouse_y):
+                    fleet, bullets, blockade, mouse_x, mouse_y):
     """Start new game when the player clicks play."""
     button_clicked = play_button.rect.collidepoint(mouse_x, mouse_y)
     if button_clicked and not stats.game_active:
-        start_game(settings, stats, screen, sb, ship, alien_groups, bullets,
+        start_game(settings, stats, screen, sb, ship, fleet, bullets,
                        blockade)
 
-def start_game(settings, stats, screen, sb, ship, alien_groups, bullets,
+def start_game(settings, stats, screen, sb, ship, fleet, bullets,
                    blockade):
     """Reset all dynamic variables, start a new game."""
+    # Settle any game cut short on the leaderboard.
+    if stats.game_active:
+        stats.record_game()
+
     # Reset dynamic settings and statistics, generate prep renders
     settings.initialise_dynamic_settings()
     stats.reset_stats()
     prep_images(sb)
 
     # Clear old, create a new fleet, center the ship.
-    for alien_column in alien_groups:
-        alien_column.empty()
+    fleet.empty()
     bullets.empty()
     blockade.empty()
-    create_fleet(settings, screen, ship, alien_groups)
+    create_fleet(settings, screen, ship, fleet)
     create_defence(settings, screen, blockade)
     ship.center_ship()
 
+    # Drop any pause still running from the last game.
+    stats.timers.clear()
+    stats.phase = 'play'
+
     # Activate the game, hide the mouse cursor.
     stats.game_active = True
     pygame.mouse.set_visible(False)
@@ -134,127 +152,165 @@ def check_high_score(stats, sb):
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 def check_bullet_alien_collision(settings, stats, screen, sb, ship,
-                                 alien_groups, bullets):
+                                 fleet, bullets):
     """Check collisions and remove any aliens that have been hit, under
     standard operation remove also the bullets."""
-
-    ships_fire = Group()
-    for bullet in bullets:
-        if bullet.direction == -1:
-            ships_fire.add(bullet)
-
     # Check if any bullets have hit aliens, remove alien if hit, dependant on
     # game settings remove bullets.
-    for alien_column in alien_groups:
-        if settings.powerbullets == True:
-            collisions = pygame.sprite.groupcollide(ships_fire, alien_column, False, True)
-        else:
-            collisions = pygame.sprite.groupcollide(ships_fire, alien_column, True, True)
-
-        if collisions:
-            for alien in collisions.values():
-                stats.score += settings.alien_points * len(alien_column)
+    collisions = fleet.collide_bullets(bullets.friendly,
+                                       not settings.powerbullets)
+
+    if collisions:
+        # Each column hit scores for every alien still standing in it.
+        column_counts = fleet.column_counts()
+        for columns in collisions.values():
+            for column in columns:
+                stats.score += settings.alien_points * column_counts[column]
                 sb.prep_score()
                 settings.increase_alien_fire()
-            check_high_score(stats, sb)
-
-        # Define the front line for alien fire.
-        define_frontline(alien_column)
+        check_high_score(stats, sb)
 
     # If the entire fleet is destroyed, start a new level.
-    count = 0
-    for alien_column in alien_groups:
-        count += len(alien_column)
-    if count == 0:
-        make_new_level(settings, stats, screen, sb, ship, alien_groups, bullets)
+    if not len(fleet):
+        make_new_level(settings, stats, screen, sb, ship, fleet, bullets)
 
-def make_new_level(settings, stats, screen, sb, ship, alien_groups, bullets):
+def make_new_level(settings, stats, screen, sb, ship, fleet, bullets):
     """Clear screen and set up next level."""
     # Destroy any existing bullets, speed up the game and create a new fleet.
     settings.increase_speed()
     stats.level += 1
     sb.prep_level()
-    create_fleet(settings, screen, ship, alien_groups)
+    create_fleet(settings, screen, ship, fleet)
+    pause_play(settings, stats, 'level_intro', settings.level_intro_pause,
+               lambda: resume_play(stats))
 
 def check_bullet_ship_collision(settings, stats, screen, sb, ship,
-                                alien_groups, bullets, blockade):
+                                fleet, bullets, blockade):
     """Check for collision between alien bullets and the ship."""
-
-    alien_fire = Group()
-    for bullet in bullets:
-        if bullet.direction == 1:
-            alien_fire.add(bullet)
-
-    if pygame.sprite.spritecollideany(ship, alien_fire):
-        ship_hit_bullet(settings, stats, screen, sb, ship, alien_groups,
+    if bullets.alien.grid().query(ship.rect).size:
+        ship_hit_bullet(settings, stats, screen, sb, ship, fleet,
                             bullets, blockade)
 
 def check_alien_ship_collision(settings, stats, screen, sb, ship,
-                               alien_groups, bullets, blockade):
+                               fleet, bullets, blockade):
     """Check for alien and ship collision."""
-    for alien_column in alien_groups:
-        if pygame.sprite.spritecollideany(ship, alien_column):
-            ship_hit_alien(settings, stats, screen, sb, ship, alien_groups,
-                               bullets, blockade)
-
-def check_bullet_blockade_collision(bullets, blockade):
-    """Has a shield been hit."""
-    pygame.sprite.groupcollide(bullets, blockade, True, True)
-
-def check_alien_blockade_collision(alien_groups, blockade):
+    if fleet.collide_rect(ship.rect).size:
+        ship_hit_alien(settings, stats, screen, sb, ship, fleet, bullets,
+                           blockade)
+
+def check_bullet_blockade_collision(settings, bullets, blockade):
+    """Has a shield been hit, erode the shield and remove the bullet."""
+    for pool in bullets.pools():
+        grid = pool.grid()
+        # The edges once for the pool, rather than once for every hit.
+        left, top, right, bottom = pool.edges()
+        hits = []
+        for shield in blockade.sprites():
+            for index in grid.query(shield.rect).tolist():
+                rect = pygame.Rect(int(left[index]), int(top[index]),
+                                   int(right[index] - left[index]),
+                                   int(bottom[index] - top[index]))
+                if shield.hit(rect):
+                    hits.append(index)
+        if hits:
+            pool.remove(hits)
+
+def check_alien_blockade_collision(fleet, blockade):
     """check to see if any aliens have reached the blockade."""
-    for alien_column in alien_groups:
-        collision = pygame.sprite.groupcollide(alien_column, blockade, False, True)
-        if collision:
-            blockade.empty()
-            break
+    # Nothing can touch a shield until the fleet reaches the shields' band.
+    shields = blockade.sprites()
+    if not shields or not len(fleet):
+        return
+    if fleet.bottom() <= min(shield.rect.top for shield in shields):
+        return
+    # Only the aliens the grid finds over a shield need testing cell by cell.
+    for shield in shields:
+        for index in fleet.collide_rect(shield.rect).tolist():
+            if shield.collide_rect(fleet.alien_rect(index)):
+                blockade.empty()
+                return
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Ship
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-def ship_hit_alien(settings, stats, screen, sb, ship, alien_groups, bullets,
+def ship_hit_alien(settings, stats, screen, sb, ship, fleet, bullets,
                        blockade):
     """Respond to ship being hit by an alien."""
+    # A ship already lost this tick, or the game over, is not lost again.
+    if stats.phase != 'play':
+        return
     # Ship lost or game over.
     stats.ships_left -= 1
     if stats.ships_left:
-        ship_lost_new_fleet(settings, screen, sb, ship, alien_groups, bullets,
-                                blockade)
+        ship_lost_new_fleet(settings, stats, screen, sb, ship, fleet,
+                                bullets, blockade)
     else:
-        game_over(stats)
+        game_over(settings, stats)
 
-def ship_hit_bullet(settings, stats, screen, sb, ship, alien_groups, bullets,
+def ship_hit_bullet(settings, stats, screen, sb, ship, fleet, bullets,
                         blockade):
-    """Respond to ship being hit by an alien."""
+    """Respond to ship being hit by an alien bullet."""
+    # A ship already lost this tick, or the game over, is not lost again.
+    if stats.phase != 'play':
+        return
     # Ship lost or game over.
     stats.ships_left -= 1
     if stats.ships_left:
-        ship_lost(settings, screen, sb, ship, alien_groups, bullets, blockade)
+        ship_lost(settings, stats, screen, sb, ship, fleet, bullets,
+                      blockade)
     else:
-        game_over(stats)
+        game_over(settings, stats)
 
-def ship_lost_new_fleet(settings, screen, sb, ship, alien_groups, bullets,
+def ship_lost_new_fleet(settings, stats, screen, sb, ship, fleet, bullets,
                             blockade):
     """Ship lost on being hit by an alien, create a new fleet."""
     sb.prep_ships()
-    for alien_column in alien_groups:
-        alien_column.empty()
-    create_fleet(settings, screen, ship, alien_groups)
+    fleet.empty()
+    create_fleet(settings, screen, ship, fleet)
     ship.center_ship()
-    sleep(0.5)
+    pause_play(settings, stats, 'respawn', settings.ship_lost_pause,
+               lambda: resume_play(stats))
 
-def ship_lost(settings, screen, sb, ship, alien_groups, bullets, blockade):
+def ship_lost(settings, stats, screen, sb, ship, fleet, bullets, blockade):
     """Ship lost on being hit by an alien bullet."""
     sb.prep_ships()
     bullets.empty()
-    sleep(0.5)
+    pause_play(settings, stats, 'respawn', settings.ship_lost_pause,
+               lambda: resume_play(stats))
 
-def game_over(stats):
+def game_over(settings, stats):
     """Game over, ship lost and no lives left."""
+    pause_play(settings, stats, 'game_over', settings.game_over_pause,
+               lambda: end_game(stats))
+
+def end_game(stats):
+    """Deactivate the game and bring back the play button and mouse."""
+    stats.record_game()
+    stats.phase = 'play'
     stats.game_active = False
     pygame.mouse.set_visible(True)
 
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#  Phases
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def pause_play(settings, stats, phase, seconds, callback):
+    """Hold the game in a phase for a number of seconds, the loop carrying
+    on drawing and taking input meanwhile, then call callback. Any pause
+    pending is cancelled, the new one replacing it."""
+    stats.timers.clear()
+    ticks = int(round(seconds * settings.tick_rate))
+    if not ticks:
+        callback()
+        return
+    stats.phase = phase
+    stats.timers.after(ticks, callback)
+
+def resume_play(stats):
+    """Return to play at the end of a pause."""
+    stats.phase = 'play'
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Bullets
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -263,74 +319,54 @@ def fire_bullet_ship(settings, screen, ship, bullets):
     """Friendly fire."""
 
     # If there are fewer bullets on screen that the max amount.
-    if settings.rapidfire == True:
-        new_bullet = FriendlyBullet(settings, screen, ship)
-        bullets.add(new_bullet)
-        return
+    if (settings.rapidfire == True or
+            len(bullets.friendly) < settings.bullets_allowd):
+        # Take a new bullet from the ships pool.
+        bullets.friendly.spawn(ship.rect.centerx, ship.rect.top)
 
-    bullet_count = 0
-    for bullet in bullets.sprites():
-        if bullet.direction == -1:
-            bullet_count += 1
 
-    if bullet_count < settings.bullets_allowd:
-        # Create a new bullet and add it to the bullets group.
-        new_bullet = FriendlyBullet(settings, screen, ship)
-        bullets.add(new_bullet)
+def fire_bullet_alien(settings, screen, fleet, shooters, bullets):
+    """Alien fire, each of the aliens at the shooters indices fires."""
+    x, y = fleet.positions(shooters)
+    bullets.alien.spawn_many(x + fleet.width // 2, y + fleet.height)
 
-
-def fire_bullet_alien(settings, screen, alien, bullets):
-    """Alien fire."""
-    new_bullet = AlienBullet(settings, screen, alien)
-    bullets.add(new_bullet)
-
-def update_bullets(settings, stats, screen, sb, ship, alien_groups, bullets,
+def update_bullets(settings, stats, screen, sb, ship, fleet, bullets,
                        blockade):
     """Update position of bullets and get rid of old bullets."""
     # Update bullet positions
-    bullets.update()
+    with profiler.phase('update_bullets.move'):
+        bullets.update()
 
     # Remove any bullets that are off screen.
-    for bullet in bullets.copy():
-        if bullet.rect.bottom <= 0 or bullet.rect.top >= settings.screen_height:
-            bullets.remove(bullet)
-
-    check_bullet_alien_collision(settings, stats, screen, sb, ship,
-                                    alien_groups, bullets)
-    check_bullet_ship_collision(settings, stats, screen, sb, ship,
-                                    alien_groups, bullets, blockade)
-    check_bullet_blockade_collision(bullets, blockade)
+    with profiler.phase('update_bullets.cull'):
+        for pool in bullets.pools():
+            pool.cull(settings.screen_height)
+
+    with profiler.phase('check_bullet_alien_collision'):
+        check_bullet_alien_collision(settings, stats, screen, sb, ship,
+                                        fleet, bullets)
+    with profiler.phase('check_bullet_ship_collision'):
+        check_bullet_ship_collision(settings, stats, screen, sb, ship,
+                                        fleet, bullets, blockade)
+    with profiler.phase('check_bullet_blockade_collision'):
+        check_bullet_blockade_collision(settings, bullets, blockade)
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #  Aliens
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-def initialise_fleet(settings, screen, ship, alien_groups):
-    """Create the pygame sprite groups for alien columns."""
-    # Create one alien and then use it to reckon how many aliens can be
-    # stored in a row with one aliens width between each.
-    alien = Alien(settings, screen)
-    number_columns = get_number_columns(settings, alien.rect.width)
-    number_rows = get_number_rows(settings, ship.rect.height, alien.rect.height)
+def initialise_fleet(settings, screen, ship, fleet):
+    """Reckon the dimensions of the alien fleet formation."""
+    # Use the size of one alien to reckon how many aliens can be stored in a
+    # row with one aliens width between each.
+    number_columns = get_number_columns(settings, fleet.width)
+    number_rows = get_number_rows(settings, ship.rect.height, fleet.height)
     settings.columns = number_columns - settings.alien_columns_removed
     settings.rows = number_rows
 
-    for column_number in range(settings.columns):
-        new_group = Group()
-        alien_groups.append(new_group)
-
-def create_fleet(settings, screen, ship, alien_groups):
+def create_fleet(settings, screen, ship, fleet):
     """Create a full fleet of aliens."""
-    # Create one alien and then use it to reckon how many aliens can be
-    # stored in a row with one aliens width between each.
-    number_columns = settings.columns
-    number_rows = settings.rows
-
-    #for column_number in range(number_columns):
-    for column_number, alien_column in enumerate(alien_groups):
-        for row_number in range(number_rows):
-            create_alien(settings, screen, alien_column, column_number,
-                             row_number)
+    fleet.create(settings.columns, settings.rows)
 
 def get_number_columns(settings, alien_width):
     """Determine the number of aliens to fit the width."""
@@ -345,85 +381,99 @@ def get_number_rows(settings, ship_height, alien_height):
     number_rows = int(available_space_y / (2 * alien_height)) / 2
     return int(number_rows / 1)
 
-def create_alien(settings, screen, alien_column, alien_number, row_number):
-    """Create and alien and set it in the column."""
-    alien = Alien(settings, screen)
-    alien_width = alien.rect.width
-    alien.x = (alien_width + 2 * alien_width * alien_number +
-            settings.shim_x)
-    alien.rect.x = alien.x
-    alien.rect.y = (alien.rect.height + 2 * alien.rect.height * row_number +
-                    settings.shim_y)
-    # Row number designates the front line of the enemy, for enemy fire.
-    alien.row = row_number
-    alien_column.add(alien)
-
-def check_fleet_edges(settings, alien_groups):
+def check_fleet_edges(settings, fleet):
     """Respond appropriately if any aliens have reached an edge."""
-    for alien_column in alien_groups:
-        for alien in alien_column.sprites():
-            if alien.check_edges():
-                change_fleet_direction(settings, alien_groups)
-                break
+    if fleet.check_edges():
+        change_fleet_direction(settings, fleet)
 
-def change_fleet_direction(settings, alien_groups):
+def change_fleet_direction(settings, fleet):
     """Drop the entire fleet and change the fleet's direction."""
-    for alien_column in alien_groups:
-        for alien in alien_column.sprites():
-            alien.rect.y += settings.fleet_drop_speed
-        settings.fleet_direction *= -1
+    fleet.drop()
+    settings.fleet_direction *= -1
 
-def check_aliens_bottom(settings, stats, screen, sb, ship, alien_groups,
+def check_aliens_bottom(settings, stats, screen, sb, ship, fleet,
                             bullets, blockade):
     """Check if any aliens have reached the bottom of the screen."""
     screen_rect = screen.get_rect()
-    for alien_column in alien_groups:
-        for alien in alien_column.sprites():
-            if alien.rect.bottom >= screen_rect.bottom:
-                # Treat the same as the ship being hit.
-                ship_lost(settings, stats, screen, sb, ship, alien_groups,
-                              bullets, blockade)
-
-def update_aliens(settings, stats, screen, sb, ship, alien_groups, bullets,
+    if fleet.check_bottom(screen_rect.bottom):
+        # Treat the same as the ship being hit.
+        ship_hit_alien(settings, stats, screen, sb, ship, fleet, bullets,
+                           blockade)
+
+def update_aliens(settings, stats, screen, sb, ship, fleet, bullets,
                       blockade):
     """
     Check if the fleet is at an edge, and then update the positions of all
     aliens in the fleet.
     """
 
-    for alien_column in alien_groups:
-        alien_column.update()
-
-    check_fleet_edges(settings, alien_groups)
-    check_alien_ship_collision(settings, stats, screen, sb, ship,
-                               alien_groups, bullets, blockade)
-    check_aliens_bottom(settings, stats, screen, sb, ship, alien_groups,
-                            bullets, blockade)
-    check_alien_blockade_collision(alien_groups, blockade)
-    generate_alien_fire(settings, screen, sb, alien_groups, bullets)
-
-def define_frontline(alien_column):
-    """Define which aliens should fire back, tag the lowermost alien in each
-    column by getting the count of aliens and then looking for that number."""
-    if len(alien_column):
-        front_line = max(alien.row for alien in alien_column.sprites())
-        for alien in alien_column.sprites():
-            if alien.row == front_line:
-                alien.front_line = True
-
-def generate_alien_fire(settings, screen, sb, alien_groups, bullets):
-    """Generate frontline alien fire."""
-    # Set the scaling of the random number generation, thus the rate of enemy
-    # fire.
+    with profiler.phase('update_aliens.move'):
+        fleet.update()
+
+    with profiler.phase('check_fleet_edges'):
+        check_fleet_edges(settings, fleet)
+    with profiler.phase('check_alien_ship_collision'):
+        check_alien_ship_collision(settings, stats, screen, sb, ship,
+                                   fleet, bullets, blockade)
+    with profiler.phase('check_aliens_bottom'):
+        check_aliens_bottom(settings, stats, screen, sb, ship, fleet,
+                                bullets, blockade)
+    with profiler.phase('check_alien_blockade_collision'):
+        check_alien_blockade_collision(fleet, blockade)
+    with profiler.phase('generate_alien_fire'):
+        generate_alien_fire(settings, stats, screen, sb, fleet, bullets)
+
+def generate_alien_fire(settings, stats, screen, sb, fleet, bullets):
+    """Generate frontline alien fire. Each alien in the front line fires on
+    any tick with a chance of one in alien_fire_rate + 1 at 60 ticks a
+    second, scaled to the tick rate. Rather than a draw for every alien
+    every tick the wait until the next tick on which any fire is drawn, and
+    redrawn should the odds change."""
     if settings.debug:
         sb.prep_fire_rate(settings.alien_fire_rate)
-    # Iterate over all aliens, if in the frontline, then randomly test to see
-    # if the alien should fire.
-    for alien_column in alien_groups:
-        for alien in alien_column:
-            if alien.front_line:
-                if randint(0, settings.alien_fire_rate) == 0:
-                    fire_bullet_alien(settings, screen, alien, bullets)
+    shooters = fleet.shooters()
+    odds = (settings.alien_fire_rate, shooters.size)
+    if odds != fleet.fire_odds:
+        # Waits are memoryless, so one may be redrawn at any time.
+        fleet.fire_odds = odds
+        fleet.fire_countdown = alien_fire_wait(settings, stats,
+                                               shooters.size)
+    fleet.fire_countdown -= 1
+    if fleet.fire_countdown > 0:
+        return
+
+    fire_bullet_alien(settings, screen, fleet,
+                      choose_alien_shooters(settings, stats, shooters),
+                      bullets)
+    fleet.fire_countdown = alien_fire_wait(settings, stats, shooters.size)
+
+def alien_fire_wait(settings, stats, front):
+    """Draw the number of ticks until the next on which one or more of the
+    front aliens fire."""
+    if not front:
+        return float('inf')
+    chance = settings.alien_fire_chance()
+    # The chance of any of the front line firing on a tick.
+    any_fire = 1.0 - (1.0 - chance) ** front
+    return int(stats.rng.geometric(any_fire))
+
+def choose_alien_shooters(settings, stats, shooters):
+    """Choose which of the shooters fire on a tick on which at least one
+    does, as if each had drawn for itself."""
+    front = shooters.size
+    chance = settings.alien_fire_chance()
+    if chance >= 1.0:
+        return shooters
+    # The place of the first to fire, given one does, then the chance that
+    # each of those after fires too.
+    any_fire = 1.0 - (1.0 - chance) ** front
+    first = int(np.ceil(np.log1p(-stats.rng.random() * any_fire) /
+                        np.log1p(-chance)))
+    first = min(max(first, 1), front)
+    number = 1 + int(stats.rng.binomial(front - first, chance))
+    if number == 1:
+        return shooters[stats.rng.integers(front, size=1)]
+    return shooters[stats.rng.choice(front, number, replace=False)]
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -454,13 +504,6 @@ def create_defence(settings, screen, blockade):
                          3*block*blockade_w, settings.screen_height - 175)
 
 def create_shield(settings, screen, blockade, rows, x, y):
-    """Build a block."""
-    width = settings.block_width
-    height = settings.block_height
-
-
-    for i, row in enumerate(rows):
-        for j, block in enumerate(row):
-            if block:
-                blockade.add(Block(settings, screen, x+j*width, y+i*height))
+    """Build a shield."""
+    blockade.add(Defence(settings, screen, rows, int(x), y))
 
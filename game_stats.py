@@ -1,3 +1,10 @@
+import time
+
+import numpy as np
+
+from leaderboard import Leaderboard
+from scheduler import Scheduler
+
 class GameStats():
     """Track statistics for Alien Invasion."""
     def __init__(self, settings):
@@ -10,7 +17,22 @@ class GameStats():
         # Start the game in an inactive state.
         self.game_active = False
 
-        # Retrieve highest score.
+        # The phase of the game, the fleet, ship and bullets only move whilst
+        # in play. Pauses, such as after losing a ship, are timed by the
+        # scheduler in game ticks.
+        self.phase = 'play'
+        self.timers = Scheduler()
+
+        # The game's own random numbers, seeded so that a session may be
+        # played again exactly.
+        self.seed = settings.seed
+        if self.seed is None:
+            self.seed = np.random.SeedSequence().entropy & (2 ** 64 - 1)
+        self.rng = np.random.default_rng(self.seed)
+
+        # Retrieve highest score from the leaderboard.
+        self.leaderboard = Leaderboard(settings.leaderboard_file,
+                                       settings.leaderboard_size)
         self.read_high_score()
 
     def reset_stats(self):
@@ -18,18 +40,19 @@ class GameStats():
         self.ships_left = self.settings.ship_limit
         self.score = 0
         self.level = 1
+        self.started = time.time()
 
     def write_high_score(self):
-        """Store highest score to file."""
-        with open('.highscore', 'w') as file_object:
-            file_object.write(str(int(self.high_score)))
-            file_object.close()
+        """Store the game in play on the leaderboard, the file is written in
+        the background."""
+        self.leaderboard.update(self.score, self.level, self.started,
+                                time.time() - self.started)
+
+    def record_game(self):
+        """Settle the finished game on the leaderboard."""
+        self.write_high_score()
+        self.leaderboard.finish()
 
     def read_high_score(self):
-        """Retrieve the highest score from file."""
-        try:
-            with open('.highscore', 'r') as file_object:
-                self.high_score = int(float(file_object.read()))
-                file_object.close()
-        except IOError as e:
-            print("File error: " + str(e))
+        """Retrieve the highest score from the leaderboard."""
+        self.high_score = self.leaderboard.high_score()
@@ -0,0 +1,41 @@
+import pygame
+
+class GlyphAtlas():
+    """The glyphs of a font rendered once onto a single surface. Text made of
+    those glyphs is composited from the atlas rather than rendered by the
+    font, any other text falls back on the font."""
+
+    def __init__(self, font, colour, characters='0123456789,'):
+        self.font = font
+        self.colour = colour
+
+        # Render each glyph and lay them side by side on the atlas.
+        glyphs = [(char, font.render(char, True, colour))
+                  for char in characters]
+        self.height = max(glyph.get_height() for _, glyph in glyphs)
+        width = sum(glyph.get_width() for _, glyph in glyphs)
+        self.surface = pygame.Surface((width, self.height), pygame.SRCALPHA)
+        self.surface.fill((0, 0, 0, 0))
+        self.rects = {}
+        x = 0
+        for char, glyph in glyphs:
+            self.rects[char] = self.surface.blit(
+                    glyph, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x += glyph.get_width()
+
+    def render(self, text):
+        """Return an image of text."""
+        rects = self.rects
+        if not all(char in rects for char in text):
+            return self.font.render(text, True, self.colour)
+
+        width = sum(rects[char].width for char in text)
+        image = pygame.Surface((width, self.height), pygame.SRCALPHA)
+        image.fill((0, 0, 0, 0))
+        # Glyphs do not overlap, so taking the maximum copies them exactly.
+        x = 0
+        for char in text:
+            image.blit(self.surface, (x, 0), rects[char],
+                       special_flags=pygame.BLEND_RGBA_MAX)
+            x += rects[char].width
+        return image
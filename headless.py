@@ -0,0 +1,200 @@
+"""Run the game logic without a window, drawing or a frame cap.
+
+The headless engine steps the same functions from game_functions that the
+main loop uses, input being fed from a scripted source rather than from the
+keyboard, and reports how many simulated frames are run per second.
+
+    python headless.py --frames 100000
+"""
+import argparse
+import os
+import time
+
+import pygame
+from pygame.sprite import Group
+
+from settings import Settings
+from game_stats import GameStats
+from scoreboard import Scoreboard
+from button import Button
+from ship import Ship
+from bullet import Bullets
+from fleet import Fleet
+from profiler import profiler, entity_counts
+
+import assets
+import game_functions as gf
+
+def init_headless():
+    """Initialise the pygame modules the game logic needs, the dummy video
+    driver provides a screen surface without opening a window."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    # Leave SIGINT and SIGTERM alone, so headless runs may be stopped as any
+    # other process would be.
+    os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+    pygame.display.init()
+    pygame.font.init()
+
+def key_event(event_type, key):
+    """Create a key event as pygame would post it."""
+    return pygame.event.Event(event_type, key=key, mod=0, unicode='',
+                              scancode=0)
+
+
+class ScriptedInput():
+    """Supply check_events with pre-arranged events, frame by frame."""
+
+    def __init__(self, script=None):
+        # Events to be handed out, keyed by frame number.
+        self.script = {}
+        for frame, event in script or ():
+            self.add(frame, event)
+
+    def add(self, frame, event):
+        """Schedule an event for the given frame."""
+        self.script.setdefault(frame, []).append(event)
+
+    def press(self, frame, key, hold=1):
+        """Press a key on one frame and release it hold frames later."""
+        self.add(frame, key_event(pygame.KEYDOWN, key))
+        self.add(frame + hold, key_event(pygame.KEYUP, key))
+
+    def events(self, frame):
+        """Return the events for the frame."""
+        return self.script.get(frame, ())
+
+
+def sweep_script(frames, sweep=120, fire_every=15, start=True):
+    """Start the game, unless it is already started, then sweep the ship
+    from side to side whilst firing."""
+    script = ScriptedInput()
+    if start:
+        script.press(0, pygame.K_p)
+    direction = pygame.K_LEFT
+    for frame in range(1, frames, sweep):
+        script.press(frame, direction, hold=sweep - 1)
+        if direction == pygame.K_LEFT:
+            direction = pygame.K_RIGHT
+        else:
+            direction = pygame.K_LEFT
+    for frame in range(1, frames, fire_every):
+        script.press(frame, pygame.K_SPACE)
+    return script
+
+
+class HeadlessGame():
+    """The game objects and loop, less the display and the frame clock."""
+
+    def __init__(self, settings=None, input_source=None):
+        init_headless()
+        if settings is None:
+            # Games run headless keep no leaderboard unless given settings
+            # asking for one.
+            settings = Settings()
+            settings.leaderboard_file = None
+        self.settings = settings
+        self.screen = pygame.display.set_mode(
+                (self.settings.screen_width, self.settings.screen_height))
+        self.input = input_source or ScriptedInput()
+        assets.defer_atlas(['alien.png', 'ship.png'])
+
+        # Make play button, stats and scoreboard.
+        self.play_button = Button(self.settings, self.screen, 'Play')
+        self.stats = GameStats(self.settings)
+        self.sb = Scoreboard(self.settings, self.screen, self.stats)
+
+        # Make a ship, a group of bullets and a swarm of aliens.
+        self.ship = Ship(self.settings, self.screen)
+        self.bullets = Bullets(self.settings, self.screen)
+        self.blockade = Group()
+        self.fleet = Fleet(self.settings, self.screen)
+
+        # Create an alien fleet and defences.
+        gf.initialise_fleet(self.settings, self.screen, self.ship,
+                            self.fleet)
+        gf.create_fleet(self.settings, self.screen, self.ship,
+                        self.fleet)
+        gf.create_defence(self.settings, self.screen, self.blockade)
+
+        self.frame = 0
+
+    def step(self):
+        """Advance the game by a single frame."""
+        profiler.start_frame()
+        with profiler.phase('check_events'):
+            gf.check_events(self.settings, self.stats, self.screen, self.sb,
+                            self.ship, self.fleet, self.bullets,
+                            self.blockade, self.play_button,
+                            self.input.events(self.frame))
+        self.tick()
+        if profiler.enabled:
+            profiler.end_frame(entity_counts(self.fleet, self.bullets,
+                                             self.blockade))
+        self.frame += 1
+
+    def tick(self):
+        """Run a tick of the game, the fleet, ship and bullets moving only
+        whilst in play."""
+        self.stats.timers.tick()
+        if self.stats.game_active and self.stats.phase == 'play':
+            with profiler.phase('ship.update'):
+                self.ship.update()
+            with profiler.phase('update_bullets'):
+                gf.update_bullets(self.settings, self.stats, self.screen,
+                                  self.sb, self.ship, self.fleet,
+                                  self.bullets, self.blockade)
+            with profiler.phase('update_aliens'):
+                gf.update_aliens(self.settings, self.stats, self.screen,
+                                 self.sb, self.ship, self.fleet,
+                                 self.bullets, self.blockade)
+
+    def run(self, frames):
+        """Run for a number of frames, return the simulated frames per
+        second."""
+        start = time.perf_counter()
+        for _ in range(frames):
+            self.step()
+        elapsed = time.perf_counter() - start
+        if elapsed:
+            return frames / elapsed
+        return float('inf')
+
+
+def run_headless(frames, input_source=None, settings=None):
+    """Play the given number of frames, return the game and its frame
+    rate."""
+    game = HeadlessGame(settings, input_source)
+    fps = game.run(frames)
+    return game, fps
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=36000,
+                        help='number of frames to simulate')
+    parser.add_argument('--profile', action='store_true',
+                        help='print percentiles of each phase')
+    parser.add_argument('--profile-csv', metavar='PATH',
+                        help="write each frame's timings to a CSV file")
+    args = parser.parse_args()
+
+    if args.profile:
+        profiler.enabled = True
+    if args.profile_csv:
+        profiler.open_csv(args.profile_csv)
+    try:
+        game, fps = run_headless(args.frames, sweep_script(args.frames))
+    finally:
+        profiler.close_csv()
+    tick_rate = game.settings.tick_rate
+    print("Simulated {:,} frames ({:,.1f} game minutes) at {:,.0f} fps, "
+          "{:,.1f}x real time.".format(args.frames,
+                                        args.frames / (60.0 * tick_rate),
+                                        fps, fps / tick_rate))
+    print("Level {}, score {:,}, ships left {}.".format(game.stats.level,
+          int(game.stats.score), game.stats.ships_left))
+    if args.profile or args.profile_csv:
+        print('\n'.join(profiler.report()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+import atexit
+import os
+import struct
+import tempfile
+import threading
+
+MAGIC = b'AILB'
+VERSION = 1
+# Magic, version and number of entries.
+HEADER = struct.Struct('<4sBB')
+# Score, level, start time and seconds played.
+ENTRY = struct.Struct('<QHII')
+
+
+class AtomicWriter():
+    """Write a file from a background thread. Data handed over whilst a
+    write is waiting replaces it, so any number of updates within a frame
+    cost the game no more than a single write. The file is written whole to
+    a temporary file then renamed over the old, so it is never left half
+    written."""
+
+    def __init__(self, path):
+        self.path = path
+        self.pending = None
+        self.written = 0
+        self.lock = threading.Condition()
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def write(self, data):
+        """Hand data over to be written, without waiting."""
+        with self.lock:
+            self.pending = data
+            self.lock.notify_all()
+
+    def run(self):
+        """Write out whatever is handed over until closed."""
+        while True:
+            with self.lock:
+                while self.pending is None and not self.closed:
+                    self.lock.wait()
+                if self.pending is None:
+                    return
+                data = self.pending
+            self.replace(data)
+            with self.lock:
+                if self.pending is data:
+                    self.pending = None
+                self.written += 1
+                self.lock.notify_all()
+
+    def replace(self, data):
+        """Write data to a temporary file and rename it over the file."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            handle, temp_path = tempfile.mkstemp(dir=directory,
+                                                 prefix='.tmp')
+            with os.fdopen(handle, 'wb') as file_object:
+                file_object.write(data)
+                file_object.flush()
+                os.fsync(file_object.fileno())
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print("File error: " + str(e))
+
+    def close(self):
+        """Write anything waiting and stop the thread."""
+        with self.lock:
+            self.closed = True
+            self.lock.notify_all()
+        self.thread.join()
+
+
+class Leaderboard():
+    """The best scores, with the level reached, when each game started and
+    how long it lasted. The game in play is kept on the board as it goes, so
+    a new high score survives the game being cut short."""
+
+    def __init__(self, path, size=10):
+        self.path = path
+        self.size = size
+        self.entries = []
+        self.current = None
+        self.writer = None
+        if path:
+            self.read()
+            self.writer = AtomicWriter(path)
+
+    def read(self):
+        """Load the board, or take the score from an old .highscore file."""
+        try:
+            with open(self.path, 'rb') as file_object:
+                data = file_object.read()
+        except FileNotFoundError:
+            self.read_legacy()
+            return
+        except IOError as e:
+            print("File error: " + str(e))
+            return
+        try:
+            magic, version, count = HEADER.unpack_from(data)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("unknown leaderboard format")
+            self.entries = [ENTRY.unpack_from(data, HEADER.size +
+                                              number * ENTRY.size)
+                            for number in range(count)]
+        except (struct.error, ValueError) as e:
+            print("File error: {} in {}".format(e, self.path))
+
+    def read_legacy(self):
+        """Take the high score kept by earlier versions of the game."""
+        try:
+            with open('.highscore', 'r') as file_object:
+                self.entries = [(int(float(file_object.read())), 0, 0, 0)]
+        except (IOError, ValueError):
+            pass
+
+    def board(self):
+        """Return the entries, best first, the game in play among them."""
+        entries = list(self.entries)
+        if self.current is not None:
+            entries.append(self.current)
+        entries.sort(key=lambda entry: -entry[0])
+        return entries[:self.size]
+
+    def high_score(self):
+        """Return the best score on the board."""
+        board = self.board()
+        if not board:
+            return 0
+        return board[0][0]
+
+    def update(self, score, level, started, seconds):
+        """Put the game in play on the board as it now stands."""
+        self.current = (int(score), level, int(started), int(seconds))
+        self.save()
+
+    def finish(self):
+        """Settle the game in play on the board."""
+        if self.current is None:
+            return
+        self.entries = self.board()
+        self.current = None
+        self.save()
+
+    def save(self):
+        """Write the board out in the background."""
+        if self.writer is None:
+            return
+        board = self.board()
+        self.writer.write(HEADER.pack(MAGIC, VERSION, len(board)) +
+                          b''.join(ENTRY.pack(*entry) for entry in board))
+
+    def close(self):
+        """Write out anything waiting."""
+        if self.writer is not None:
+            self.writer.close()
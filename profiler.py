@@ -0,0 +1,246 @@
+import csv
+import time
+from collections import deque
+
+import pygame
+
+# The phases of the main loop in the order they run, nested phases are
+# named after the function they fall within.
+PHASES = [
+    'check_events',
+    'ship.update',
+    'update_bullets',
+    'update_bullets.move',
+    'update_bullets.cull',
+    'check_bullet_alien_collision',
+    'check_bullet_ship_collision',
+    'check_bullet_blockade_collision',
+    'update_aliens',
+    'update_aliens.move',
+    'check_fleet_edges',
+    'check_alien_ship_collision',
+    'check_aliens_bottom',
+    'check_alien_blockade_collision',
+    'generate_alien_fire',
+    'update_screen',
+    'frame',
+]
+
+# Entity counts recorded alongside the timings.
+COUNTS = ['aliens', 'friendly_bullets', 'alien_bullets', 'shield_cells']
+
+
+class _Phase():
+    """Times one phase, adding the time to the current frame."""
+    __slots__ = ('current', 'name', 'start')
+
+    def __init__(self, current, name):
+        self.current = current
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        self.current[self.name] = self.current.get(self.name, 0.0) + elapsed
+
+
+class _NullPhase():
+    """Stands in for a phase whilst the profiler is disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+_NULL_PHASE = _NullPhase()
+
+
+class FrameProfiler():
+    """Time the phases of each frame with
+
+        with profiler.phase('update_bullets'):
+            ...
+
+    which costs next to nothing whilst disabled. The time of each phase is
+    summed over the frame and kept over a rolling window of frames, from
+    which percentiles are shown on an overlay, and each frame may be written
+    to a CSV file along with its entity counts."""
+
+    def __init__(self, window=300):
+        self.enabled = False
+        self.show_overlay = False
+
+        # This frame's phase times and the last window frames of each.
+        self.current = {}
+        self.samples = {}
+        self.window = window
+        self.timers = {}
+        self.frame_start = 0.0
+        self.frames = 0
+
+        # CSV output, if opened.
+        self.csv_file = None
+        self.csv_writer = None
+
+        # Overlay image, refreshed every so many frames.
+        self.overlay_every = 30
+        self.overlay_image = None
+        self.overlay_font = None
+
+    def reset(self, window=None):
+        """Forget the timings so far, keeping window frames from now on."""
+        if window is not None:
+            self.window = window
+        self.current.clear()
+        self.samples = {}
+        self.frames = 0
+        self.overlay_image = None
+
+    def phase(self, name):
+        """Return a context manager timing the named phase."""
+        if not self.enabled:
+            return _NULL_PHASE
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = _Phase(self.current, name)
+        return timer
+
+    def start_frame(self):
+        """Mark the start of a frame."""
+        if self.enabled:
+            self.frame_start = time.perf_counter()
+
+    def end_frame(self, counts=None):
+        """Close the frame, filing its phase times and writing them out
+        along with counts, a dict of entity counts."""
+        if not self.enabled:
+            return
+        self.current['frame'] = time.perf_counter() - self.frame_start
+        # Phases that did not run take 0.0, so every window covers the same
+        # frames.
+        for name in PHASES:
+            self.current.setdefault(name, 0.0)
+        for name, elapsed in self.current.items():
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+            samples.append(elapsed)
+
+        if self.csv_writer is not None:
+            row = {'frame_number': self.frames}
+            for name in PHASES:
+                row[name] = "{:.4f}".format(self.current.get(name, 0.0) *
+                                            1000)
+            row.update(counts or {})
+            self.csv_writer.writerow(row)
+
+        self.current.clear()
+        self.frames += 1
+        if self.show_overlay and not self.frames % self.overlay_every:
+            self.overlay_image = None
+
+    def percentiles(self, name, points=(50, 95, 99)):
+        """Return the given percentiles of a phase, in milliseconds, over
+        the rolling window."""
+        samples = sorted(self.samples.get(name, ()))
+        if not samples:
+            return [0.0 for point in points]
+        last = len(samples) - 1
+        return [samples[int(round(last * point / 100.0))] * 1000
+                for point in points]
+
+    def report(self):
+        """Return lines of the percentiles of each phase."""
+        lines = ["{:<32}{:>8}{:>8}{:>8}".format('phase ms', 'p50', 'p95',
+                                                'p99')]
+        for name in PHASES:
+            # Phases that have not run within the window are left out.
+            if any(self.samples.get(name, ())):
+                lines.append("{:<32}{:>8.3f}{:>8.3f}{:>8.3f}".format(
+                             name, *self.percentiles(name)))
+        return lines
+
+    def toggle_overlay(self):
+        """Show or hide the overlay, profiling whilst it is shown."""
+        self.show_overlay = not self.show_overlay
+        self.overlay_image = None
+        if self.show_overlay and not self.enabled:
+            self.enabled = True
+            self.frame_start = time.perf_counter()
+        elif self.csv_writer is None:
+            self.enabled = False
+
+    def overlay(self):
+        """Return the overlay image, rendering it afresh every
+        overlay_every frames."""
+        if self.overlay_image is None:
+            if self.overlay_font is None:
+                self.overlay_font = pygame.font.SysFont('monospace', 14)
+            lines = [self.overlay_font.render(line, True, (255, 255, 255))
+                     for line in self.report()]
+            height = self.overlay_font.get_linesize()
+            width = max(line.get_width() for line in lines)
+            self.overlay_image = pygame.Surface(
+                    (width + 8, height * len(lines) + 8), pygame.SRCALPHA)
+            self.overlay_image.fill((0, 0, 0, 160))
+            for number, line in enumerate(lines):
+                self.overlay_image.blit(line, (4, 4 + number * height))
+        return self.overlay_image
+
+    def open_csv(self, path):
+        """Write each frame's timings and entity counts to a CSV file,
+        profiling from now on."""
+        self.close_csv()
+        self.csv_file = open(path, 'w', newline='')
+        self.csv_writer = csv.DictWriter(
+                self.csv_file, ['frame_number'] + PHASES + COUNTS,
+                extrasaction='ignore')
+        self.csv_writer.writeheader()
+        self.enabled = True
+
+    def close_csv(self):
+        """Finish writing the CSV file."""
+        if self.csv_file is not None:
+            self.csv_file.close()
+            self.csv_file = None
+            self.csv_writer = None
+            self.enabled = self.show_overlay
+
+
+class StartupTimer():
+    """Time the steps from launch to the first frame drawn."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.steps = []
+
+    def mark(self, name):
+        """Note the time taken since the last step as the step name."""
+        now = time.perf_counter()
+        self.steps.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        """Return a line per step and the total, in milliseconds."""
+        lines = ["{:<20}{:>9.2f} ms".format(name, elapsed * 1000)
+                 for name, elapsed in self.steps]
+        lines.append("{:<20}{:>9.2f} ms".format(
+                     'total', (self.last - self.start) * 1000))
+        return lines
+
+
+# The profiler shared by the game loop and game functions.
+profiler = FrameProfiler()
+
+def entity_counts(fleet, bullets, blockade):
+    """Return the entity counts recorded with each frame."""
+    return {'aliens': len(fleet),
+            'friendly_bullets': len(bullets.friendly),
+            'alien_bullets': len(bullets.alien),
+            'shield_cells': sum(shield.standing for shield in blockade)}
@@ -0,0 +1,137 @@
+import pygame
+
+import assets
+from profiler import profiler
+
+class DirtyRenderer():
+    """Draw the screen by dirty rectangles. The background is restored only
+    under what has moved or changed since the last frame, and only those
+    regions are pushed to the display."""
+
+    def __init__(self, settings, screen):
+        self.settings = settings
+        self.screen = screen
+        self.screen_rect = screen.get_rect()
+
+        # What was on screen last frame, key to (rect, token), and the rects
+        # of last frame's bullets.
+        self.previous = {}
+        self.previous_bullets = []
+        self.invalidate()
+
+        # Pixels pushed to the display against those a full flip pushes.
+        self.frames = 0
+        self.pixels = 0
+
+    def invalidate(self):
+        """Repaint and push the whole screen on the next frame."""
+        self.full_redraw = True
+
+    def items(self, stats, sb, ship, fleet, blockade, play_button, alpha):
+        """Return what is to be drawn over the bullets, bottom to top, as
+        (key, rect, token, draw) with draw called to draw the item. An item
+        whose rect and token match last frame's is unchanged."""
+        screen = self.screen
+        items = [('ship', ship.draw_rect(alpha), None,
+                  lambda: ship.blitme(alpha))]
+        fleet_rect = fleet.bounding_rect(alpha)
+        if fleet_rect.width:
+            items.append(('fleet', fleet_rect, len(fleet),
+                          lambda: fleet.draw(screen, alpha)))
+        for shield in blockade.sprites():
+            items.append((shield, shield.rect, shield.standing,
+                          lambda shield=shield: screen.blit(shield.image,
+                                                            shield.rect)))
+        for number, (image, rect) in enumerate(sb.images()):
+            items.append((('score', number), rect.copy(), image,
+                          lambda image=image, rect=rect: screen.blit(image,
+                                                                     rect)))
+        if not stats.game_active:
+            items.append(('button', play_button.rect, play_button.msg_image,
+                          play_button.draw_button))
+        if profiler.show_overlay:
+            overlay = profiler.overlay()
+            rect = overlay.get_rect(
+                    topleft=self.settings.profiler_overlay_position)
+            items.append(('profiler', rect, overlay,
+                          lambda: screen.blit(overlay, rect)))
+        return items
+
+    def draw(self, stats, sb, ship, fleet, bullets, blockade, play_button,
+             alpha=1.0):
+        """Redraw what has changed and push it to the display, moving things
+        drawn alpha of the way from their previous tick to their current
+        one."""
+        background = assets.load_image(self.settings.bg_image, False,
+                                       self.screen_rect.size)
+        items = self.items(stats, sb, ship, fleet, blockade, play_button,
+                           alpha)
+
+        if self.full_redraw:
+            self.screen.blit(background, (0, 0))
+            bullet_rects = bullets.draw(self.screen, alpha)
+            for item in items:
+                item[3]()
+            pygame.display.flip()
+            dirty_area = self.screen_rect.width * self.screen_rect.height
+            self.full_redraw = False
+        else:
+            # Bullets move every frame, their old and new places are dirty,
+            # as are both places of any item that has moved or changed.
+            bullet_rects = bullets.rects(alpha)
+            dirty = self.previous_bullets + bullet_rects
+            redraw = []
+            keys = set()
+            for key, rect, token, _ in items:
+                keys.add(key)
+                unchanged = self.previous.get(key) == (rect, token)
+                redraw.append(not unchanged)
+                if not unchanged:
+                    dirty.append(rect)
+                    if key in self.previous:
+                        dirty.append(self.previous[key][0])
+            for key, (rect, token) in self.previous.items():
+                if key not in keys:
+                    dirty.append(rect)
+
+            # An unchanged item overlapping a dirty region is redrawn whole,
+            # making its rect dirty in turn.
+            changed = bool(dirty)
+            while changed:
+                changed = False
+                for index, item in enumerate(items):
+                    if not redraw[index] and item[1].collidelist(dirty) != -1:
+                        redraw[index] = True
+                        dirty.append(item[1])
+                        changed = True
+
+            # Restore the background under the dirty regions and redraw.
+            for rect in dirty:
+                # Clip first, an area outside the background would be shifted.
+                rect = self.screen_rect.clip(rect)
+                self.screen.blit(background, rect, rect)
+            bullets.draw(self.screen, alpha)
+            for index, item in enumerate(items):
+                if redraw[index]:
+                    item[3]()
+            pygame.display.update(dirty)
+            dirty_area = 0
+            for rect in dirty:
+                visible = self.screen_rect.clip(rect)
+                dirty_area += visible.width * visible.height
+
+        self.previous = dict((key, (rect, token))
+                             for key, rect, token, _ in items)
+        self.previous_bullets = bullet_rects
+        self.frames += 1
+        self.pixels += dirty_area
+
+    def report(self):
+        """Describe the pixel throughput saved against full flips."""
+        if not self.frames:
+            return "No frames drawn."
+        full = self.screen_rect.width * self.screen_rect.height
+        average = self.pixels / self.frames
+        return ("Pushed {:,.0f} pixels a frame on average against {:,} for "
+                "a full flip, {:.1%} saved.".format(average, full,
+                                                    1 - average / full))
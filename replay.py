@@ -0,0 +1,182 @@
+"""Record the input of a session and play it back headlessly.
+
+A session recorded by setting Settings.record_input is played back tick for
+tick without a window or frame cap, checking the state of the game against
+the checksum recorded for each tick, so a slow session can be reproduced
+exactly and profiled as often as needed.
+
+    python replay.py session.rec --profile
+"""
+import argparse
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+import pygame
+
+from settings import Settings
+from headless import HeadlessGame, key_event
+from profiler import profiler
+
+MAGIC = b'AIRC'
+VERSION = 2
+# Magic, version, seed, number of events and number of ticks.
+HEADER = struct.Struct('<4sBQII')
+# Tick, kind, key and mouse position.
+EVENT = struct.Struct('<IBiHH')
+
+# The kinds of event recorded, any others have no bearing on the game.
+KEYDOWN, KEYUP, MOUSEBUTTONDOWN = range(3)
+KINDS = {pygame.KEYDOWN: KEYDOWN, pygame.KEYUP: KEYUP,
+         pygame.MOUSEBUTTONDOWN: MOUSEBUTTONDOWN}
+
+def state_checksum(stats, ship, fleet, bullets, blockade):
+    """Return a checksum of the state of play. The high score is left out,
+    it is read from a file that may differ between machines."""
+    crc = zlib.crc32(struct.pack('<dqq??d', stats.score, stats.level,
+                                 stats.ships_left, stats.game_active,
+                                 stats.phase == 'play', ship.center))
+    for values in fleet.positions() + (fleet.alive,):
+        crc = zlib.crc32(values.tobytes(), crc)
+    for pool in bullets.pools():
+        crc = zlib.crc32(pool.x[:pool.count].tobytes(), crc)
+        crc = zlib.crc32(pool.y[:pool.count].tobytes(), crc)
+    for shield in blockade.sprites():
+        crc = zlib.crc32(shield.cells.tobytes(), crc)
+    return crc
+
+
+class InputRecorder():
+    """Log the input of a session tick by tick along with a checksum of the
+    state after each tick, written out when the session ends."""
+
+    def __init__(self, path, seed):
+        self.path = path
+        self.seed = seed
+        self.events = bytearray()
+        self.count = 0
+        self.checksums = array('I')
+
+    def record(self, tick, events):
+        """Log the events handled before the given tick is run."""
+        for event in events:
+            kind = KINDS.get(event.type)
+            if kind is None:
+                continue
+            if kind == MOUSEBUTTONDOWN:
+                self.events += EVENT.pack(tick, kind, 0, *event.pos)
+            else:
+                self.events += EVENT.pack(tick, kind, event.key, 0, 0)
+            self.count += 1
+
+    def tick(self, checksum):
+        """Log the checksum of the state after a tick."""
+        self.checksums.append(checksum)
+
+    def save(self):
+        """Write the recording out."""
+        with open(self.path, 'wb') as f_obj:
+            f_obj.write(HEADER.pack(MAGIC, VERSION, self.seed, self.count,
+                                    len(self.checksums)))
+            f_obj.write(self.events)
+            f_obj.write(self.checksums.tobytes())
+
+
+class Recording():
+    """A recorded session, handing its events out tick by tick as a
+    scripted input source would."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f_obj:
+            data = f_obj.read()
+        magic, version, self.seed, count, ticks = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a version {} recording.".format(
+                             path, VERSION))
+
+        self.script = {}
+        offset = HEADER.size
+        for _ in range(count):
+            tick, kind, key, x, y = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            if kind == MOUSEBUTTONDOWN:
+                event = pygame.event.Event(pygame.MOUSEBUTTONDOWN,
+                                           pos=(x, y), button=1)
+            elif kind == KEYDOWN:
+                event = key_event(pygame.KEYDOWN, key)
+            else:
+                event = key_event(pygame.KEYUP, key)
+            self.script.setdefault(tick, []).append(event)
+
+        self.checksums = array('I')
+        self.checksums.frombytes(data[offset:offset + 4 * ticks])
+
+    def __len__(self):
+        """Number of ticks recorded."""
+        return len(self.checksums)
+
+    def events(self, frame):
+        """Return the events handled before the tick."""
+        return self.script.get(frame, ())
+
+
+def replay(recording):
+    """Play a recording back as fast as possible, return the game, the
+    ticks run per second and the first tick whose state differs from the
+    recording, or None."""
+    settings = Settings()
+    settings.seed = recording.seed
+    # A replayed game is not a new score.
+    settings.leaderboard_file = None
+    game = HeadlessGame(settings, recording)
+    diverged = None
+    start = time.perf_counter()
+    for tick in range(len(recording)):
+        game.step()
+        if diverged is None:
+            checksum = state_checksum(game.stats, game.ship, game.fleet,
+                                      game.bullets, game.blockade)
+            if checksum != recording.checksums[tick]:
+                diverged = tick
+    elapsed = time.perf_counter() - start
+    return game, len(recording) / max(elapsed, 1e-9), diverged
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('recording', help='recorded session to play back')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='number of times to play the session')
+    parser.add_argument('--profile', action='store_true',
+                        help='print percentiles of each phase')
+    parser.add_argument('--profile-csv', metavar='PATH',
+                        help="write each tick's timings to a CSV file")
+    args = parser.parse_args()
+
+    recording = Recording(args.recording)
+    if args.profile:
+        profiler.reset(window=len(recording))
+        profiler.enabled = True
+    if args.profile_csv:
+        profiler.open_csv(args.profile_csv)
+    try:
+        for _ in range(args.repeat):
+            game, rate, diverged = replay(recording)
+            print("Played {:,} ticks at {:,.0f} ticks a second, level {}, "
+                  "score {:,}.".format(len(recording), rate,
+                                       game.stats.level,
+                                       int(game.stats.score)))
+    finally:
+        profiler.close_csv()
+    if args.profile or args.profile_csv:
+        print('\n'.join(profiler.report()))
+
+    if diverged is not None:
+        print("The game diverged from the recording at tick {:,}.".format(
+              diverged))
+        sys.exit(1)
+    print("Every tick matched the recording.")
+
+if __name__ == '__main__':
+    main()
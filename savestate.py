@@ -0,0 +1,272 @@
+"""Save the whole state of a game to bytes and restore it.
+
+The state is packed with struct and numpy rather than pickled: the settings
+that change in play, the stats and the position of the random numbers, the
+ship, the fleet as its living aliens and origin, the bullet pools and the
+cells of each shield. A game restored carries on exactly as the one saved,
+so games may be resumed, rewound or forked to look ahead.
+
+Run as a script, this times saving and restoring a game with a large fleet
+and many bullets, and reports the size of the state.
+
+    python savestate.py --columns 40 --rows 20 --bullets 5000
+"""
+import argparse
+import struct
+import timeit
+
+import numpy as np
+
+import game_functions as gf
+
+MAGIC = b'AISS'
+VERSION = 2
+# Magic, version and the tick the state was saved on.
+HEADER = struct.Struct('<4sBI')
+# Ship, bullet and alien speeds, alien points, fire rate, fleet direction
+# and the bullet power ups.
+SETTINGS = struct.Struct('<ddddib???')
+# Score, high score, level, ships left, start time, game_active, phase and
+# the tick the pause ends on, 0 for none.
+STATS = struct.Struct('<ddHhd?BI')
+# The state and increment of the PCG64 generator, and its spare 32 bits.
+RNG = struct.Struct('<16s16sBI')
+# Centre, centre at the previous tick and the movement flags.
+SHIP = struct.Struct('<dd??')
+# Columns, rows, aliens in the front line, origin, last step, ticks until
+# the front line fires and the odds that wait was drawn for, -1 for none.
+# Followed by the living aliens as bits and the front line.
+FLEET = struct.Struct('<IIIdddddii')
+# Bullets in a pool, followed by the x, y, width, height and speed of each.
+POOL = struct.Struct('<I')
+POOL_ARRAYS = [('x', '<i4'), ('y', '<f8'), ('width', '<i2'),
+               ('height', '<i2'), ('speed', '<f8')]
+# Shields standing, then the position and cell grid size of each, followed
+# by its cells as bits.
+SHIELDS = struct.Struct('<I')
+SHIELD = struct.Struct('<hhHH')
+
+# The phases of play, and what ends each pause.
+PHASES = ['play', 'respawn', 'level_intro', 'game_over']
+PAUSE_ENDS = {'respawn': gf.resume_play, 'level_intro': gf.resume_play,
+              'game_over': gf.end_game}
+
+
+def save_state(settings, stats, ship, fleet, bullets, blockade):
+    """Return the state of the game as bytes."""
+    parts = [HEADER.pack(MAGIC, VERSION, stats.timers.ticks),
+             SETTINGS.pack(settings.ship_speed_factor,
+                           settings.bullet_speed_factor,
+                           settings.alien_speed_factor,
+                           settings.alien_points, settings.alien_fire_rate,
+                           settings.fleet_direction, settings.rapidfire,
+                           settings.powerbullets, settings.widebullets),
+             STATS.pack(stats.score, stats.high_score, stats.level,
+                        stats.ships_left, stats.started, stats.game_active,
+                        PHASES.index(stats.phase),
+                        stats.timers.next_due() or 0)]
+
+    rng = stats.rng.bit_generator.state
+    parts.append(RNG.pack(rng['state']['state'].to_bytes(16, 'little'),
+                          rng['state']['inc'].to_bytes(16, 'little'),
+                          rng['has_uint32'], rng['uinteger']))
+    parts.append(SHIP.pack(ship.center, ship.previous_center,
+                           ship.moving_left, ship.moving_right))
+
+    shooters = fleet.shooters()
+    parts.append(FLEET.pack(fleet.columns, fleet.rows, shooters.size,
+                            fleet.origin_x, fleet.origin_y, fleet.step_x,
+                            fleet.step_y, fleet.fire_countdown,
+                            *(fleet.fire_odds or (-1, -1))))
+    parts.append(np.packbits(fleet.alive).tobytes())
+    parts.append(shooters.astype('<i4').tobytes())
+
+    for pool in bullets.pools():
+        parts.append(POOL.pack(pool.count))
+        parts.extend(getattr(pool, name)[:pool.count].astype(dtype).tobytes()
+                     for name, dtype in POOL_ARRAYS)
+
+    parts.append(SHIELDS.pack(len(blockade)))
+    for shield in blockade.sprites():
+        parts.append(SHIELD.pack(shield.rect.x, shield.rect.y,
+                                 *shield.cells.shape))
+        parts.append(np.packbits(shield.cells).tobytes())
+    return b''.join(parts)
+
+def unpack_bits(data, offset, count):
+    """Return count bools packed as bits at offset, and the offset after
+    them."""
+    size = -(-count // 8)
+    bits = np.unpackbits(np.frombuffer(data, np.uint8, size, offset),
+                         count=count).astype(bool)
+    return bits, offset + size
+
+def restore_state(data, settings, stats, screen, sb, ship, fleet, bullets,
+                  blockade):
+    """Put the game back in the state saved."""
+    magic, version, ticks = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a version {} saved state.".format(VERSION))
+    offset = HEADER.size
+
+    (settings.ship_speed_factor, settings.bullet_speed_factor,
+     settings.alien_speed_factor, settings.alien_points,
+     settings.alien_fire_rate, settings.fleet_direction, settings.rapidfire,
+     settings.powerbullets, settings.widebullets) = SETTINGS.unpack_from(
+            data, offset)
+    offset += SETTINGS.size
+
+    (stats.score, stats.high_score, stats.level, stats.ships_left,
+     stats.started, stats.game_active, phase, due) = STATS.unpack_from(
+            data, offset)
+    offset += STATS.size
+    stats.phase = PHASES[phase]
+    stats.timers.clear()
+    stats.timers.ticks = ticks
+    if due:
+        end = PAUSE_ENDS[stats.phase]
+        stats.timers.after(due - ticks, lambda: end(stats))
+
+    state, inc, has_uint32, uinteger = RNG.unpack_from(data, offset)
+    offset += RNG.size
+    stats.rng.bit_generator.state = {
+            'bit_generator': 'PCG64',
+            'state': {'state': int.from_bytes(state, 'little'),
+                      'inc': int.from_bytes(inc, 'little')},
+            'has_uint32': has_uint32, 'uinteger': uinteger}
+
+    (ship.center, ship.previous_center, ship.moving_left,
+     ship.moving_right) = SHIP.unpack_from(data, offset)
+    offset += SHIP.size
+    ship.rect.centerx = ship.center
+
+    (columns, rows, front, fleet.origin_x, fleet.origin_y, fleet.step_x,
+     fleet.step_y, countdown, rate, size) = FLEET.unpack_from(data, offset)
+    offset += FLEET.size
+    alive, offset = unpack_bits(data, offset, columns * rows)
+    shooters = np.frombuffer(data, '<i4', front, offset)
+    offset += shooters.nbytes
+    fleet.restore(columns, rows, alive, shooters)
+    if countdown != float('inf'):
+        countdown = int(countdown)
+    fleet.fire_countdown = countdown
+    fleet.fire_odds = (rate, size) if rate >= 0 else None
+
+    for pool in bullets.pools():
+        count, = POOL.unpack_from(data, offset)
+        offset += POOL.size
+        for name, dtype in POOL_ARRAYS:
+            values = np.frombuffer(data, dtype, count, offset)
+            getattr(pool, name)[:count] = values
+            offset += values.nbytes
+        pool.count = count
+        pool.grid_stale = True
+
+    count, = SHIELDS.unpack_from(data, offset)
+    offset += SHIELDS.size
+    saved = {}
+    for _ in range(count):
+        x, y, cell_rows, cell_columns = SHIELD.unpack_from(data, offset)
+        offset += SHIELD.size
+        cells, offset = unpack_bits(data, offset, cell_rows * cell_columns)
+        saved[(x, y)] = cells.reshape(cell_rows, cell_columns)
+
+    # Shields are matched up by position, the blockade being built afresh
+    # should one saved have fallen since.
+    shields = dict((shield.rect.topleft, shield)
+                   for shield in blockade.sprites())
+    if not set(saved) <= set(shields):
+        blockade.empty()
+        gf.create_defence(settings, screen, blockade)
+        shields = dict((shield.rect.topleft, shield)
+                       for shield in blockade.sprites())
+    for position, shield in shields.items():
+        if position in saved:
+            shield.restore(saved[position])
+        else:
+            shield.kill()
+
+    gf.prep_images(sb)
+
+
+def main():
+    from headless import HeadlessGame
+    from replay import state_checksum
+    from settings import Settings
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--columns', type=int, default=40,
+                        help='columns of aliens in the fleet')
+    parser.add_argument('--rows', type=int, default=20,
+                        help='rows of aliens in the fleet')
+    parser.add_argument('--bullets', type=int, default=5000,
+                        help='bullets in each pool')
+    parser.add_argument('--number', type=int, default=1000,
+                        help='times to save and restore')
+    parser.add_argument('--ticks', type=int, default=600,
+                        help='ticks a restored game is checked for')
+    args = parser.parse_args()
+
+    def new_game():
+        settings = Settings()
+        settings.seed = 0
+        settings.leaderboard_file = None
+        game = HeadlessGame(settings)
+        gf.start_game(settings, game.stats, game.screen, game.sb, game.ship,
+                      game.fleet, game.bullets, game.blockade)
+        return game
+
+    def checksum(game):
+        return state_checksum(game.stats, game.ship, game.fleet,
+                              game.bullets, game.blockade)
+
+    # A game part way through, given a large fleet and full bullet pools.
+    game = new_game()
+    for _ in range(10):
+        game.tick()
+    rng = np.random.default_rng(0)
+    game.fleet.create(args.columns, args.rows)
+    game.fleet.kill(rng.choice(len(game.fleet), len(game.fleet) // 3,
+                               replace=False))
+    for pool in game.bullets.pools():
+        for _ in range(args.bullets):
+            pool.spawn(int(rng.integers(game.settings.screen_width)),
+                       int(rng.integers(game.settings.screen_height)))
+    for shield in game.blockade.sprites():
+        shield.hit(shield.rect.inflate(-shield.rect.width // 2, 0))
+
+    print("{:,} aliens, {:,} alive, {:,} bullets, {} shields.".format(
+          args.columns * args.rows, len(game.fleet), len(game.bullets),
+          len(game.blockade)))
+
+    objects = (game.settings, game.stats, game.ship, game.fleet,
+               game.bullets, game.blockade)
+    state = save_state(*objects)
+    save = timeit.timeit(lambda: save_state(*objects), number=args.number)
+
+    fork = new_game()
+    restore = timeit.timeit(
+            lambda: restore_state(state, fork.settings, fork.stats,
+                                  fork.screen, fork.sb, fork.ship,
+                                  fork.fleet, fork.bullets, fork.blockade),
+            number=args.number)
+
+    # The fork should carry on as the game it was taken from.
+    matched = checksum(fork) == checksum(game)
+    for _ in range(args.ticks):
+        game.tick()
+        fork.tick()
+        matched = matched and checksum(fork) == checksum(game)
+
+    print("State of {:,} bytes, saved in {:.1f} us and restored in {:.1f} us."
+          .format(len(state), save / args.number * 1e6,
+                  restore / args.number * 1e6))
+    if matched:
+        print("The restored game matched the original for {:,} ticks."
+              .format(args.ticks))
+    else:
+        print("The restored game diverged from the original.")
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+class Scheduler():
+    """A timer wheel counting game ticks. Callbacks are filed in the slot of
+    the tick they fall due on and run by the game loop as it ticks, so waits
+    never block drawing or input."""
+
+    def __init__(self, slots=256):
+        self.wheel = [[] for _ in range(slots)]
+        self.ticks = 0
+        self.pending = 0
+
+    def __len__(self):
+        """Number of callbacks waiting."""
+        return self.pending
+
+    def after(self, ticks, callback):
+        """Run callback a number of ticks from now, at least one."""
+        due = self.ticks + max(1, int(ticks))
+        self.wheel[due % len(self.wheel)].append((due, callback))
+        self.pending += 1
+
+    def tick(self):
+        """Advance one tick and run the callbacks falling due."""
+        self.ticks += 1
+        if not self.pending:
+            return
+        slot = self.wheel[self.ticks % len(self.wheel)]
+        due = [entry for entry in slot if entry[0] == self.ticks]
+        if not due:
+            return
+        slot[:] = [entry for entry in slot if entry[0] != self.ticks]
+        self.pending -= len(due)
+        for _, callback in due:
+            callback()
+
+    def next_due(self):
+        """Return the tick the next callback falls due on, or None."""
+        if not self.pending:
+            return None
+        return min(entry[0] for slot in self.wheel for entry in slot)
+
+    def clear(self):
+        """Forget every waiting callback."""
+        for slot in self.wheel:
+            del slot[:]
+        self.pending = 0
@@ -1,10 +1,10 @@
-import pygame.font
-from pygame.sprite import Group
-
-from ship import Ship
+import assets
+from glyphs import GlyphAtlas
 
 class Scoreboard():
-    """A class to report scoring information."""
+    """A class to report scoring information. Numbers are composited from a
+    glyph atlas, and a field is rendered only when it is drawn and its value
+    has changed, so many updates in a frame cost no more than one."""
 
     def __init__(self, settings, screen, stats):
         """Initialise scorekeeping attributes."""
@@ -15,7 +15,13 @@ class Scoreboard():
 
         # Font settings for scoring information.
         self.text_colour = (255, 216, 105)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font = assets.load_font(48)
+        self.glyphs = GlyphAtlas(self.font, self.text_colour)
+
+        # The values last rendered and the fields waiting to be rendered.
+        self.shown = {}
+        self.stale = set()
+        self.fire_rate = 0
 
         # Prepare the initial score alnd level images.
         self.prep_score()
@@ -24,66 +30,112 @@ class Scoreboard():
         self.prep_ships()
         if settings.debug:
             self.prep_fire_rate(0)
+        self.refresh()
 
     def prep_score(self):
-        """Turn the score into a rendered image."""
+        """Turn the score into a rendered image, when next drawn."""
+        self.stale.add('score')
+
+    def prep_high_score(self):
+        """Turn the high score into a rendered image, when next drawn."""
+        self.stale.add('high_score')
+
+    def prep_level(self):
+        """Turn the level into a rendered image, when next drawn."""
+        self.stale.add('level')
+
+    def prep_fire_rate(self, rate):
+        """debug fire rate"""
+        self.fire_rate = rate
+        self.stale.add('fire_rate')
+
+    def render(self, field, value):
+        """Return an image of value, or None if it is the value already
+        shown in field."""
+        if self.shown.get(field) == value:
+            return None
+        self.shown[field] = value
+        return self.glyphs.render("{:,}".format(value))
+
+    def render_score(self):
+        """Render the score."""
         rounded_score = int(round(self.stats.score, -1))
-        score_str = "{:,}".format(rounded_score)
-        self.score_image = self.font.render(score_str, True, self.text_colour)
+        image = self.render('score', rounded_score)
+        if image is None:
+            return
+        self.score_image = image
 
         # Display the score at the top right of the screen.
         self.score_rect = self.score_image.get_rect()
         self.score_rect.right = self.screen_rect.right - 20
         self.score_rect.top = 20
 
-    def prep_high_score(self):
-        """Turn the high score into a rendered image."""
+    def render_high_score(self):
+        """Render the high score."""
         high_score = int(round(self.stats.high_score, -1))
-        high_score_str = "{:,}".format(high_score)
-        self.high_score_image = self.font.render(high_score_str, True,
-                self.text_colour)
+        image = self.render('high_score', high_score)
+        if image is None:
+            return
+        self.high_score_image = image
 
         # Center the high score at the top of the screen.
         self.high_score_rect = self.high_score_image.get_rect()
         self.high_score_rect.centerx = self.screen_rect.centerx
         self.high_score_rect.top = self.score_rect.top
 
-    def prep_level(self):
-        """Turn the level into a rendered image."""
-        self.level_image = self.font.render(str(self.stats.level), True,
-                self.text_colour)
+    def render_level(self):
+        """Render the level."""
+        image = self.render('level', self.stats.level)
+        if image is None:
+            return
+        self.level_image = image
 
         # Position the level below the score.
         self.level_rect = self.level_image.get_rect()
         self.level_rect.right = self.score_rect.right
         self.level_rect.top = self.score_rect.bottom + 10
 
-    def prep_ships(self):
-        """Show how many ships are left."""
-        self.ships = Group()
-        for ship_number in range(self.stats.ships_left):
-            ship = Ship(self.settings, self.screen)
-            ship.rect.x = 10 + ship_number * ship.rect.width
-            ship.rect.y = 10
-            self.ships.add(ship)
-
-    def prep_fire_rate(self, rate):
-        """debug fire rate"""
-        self.fire_rate = rate
-        self.fire_rate_str = "{:,}".format(rate)
-        self.fire_rate_image = self.font.render(self.fire_rate_str, True,
-                self.text_colour)
+    def render_fire_rate(self):
+        """Render the debug fire rate."""
+        image = self.render('fire_rate', self.fire_rate)
+        if image is None:
+            return
+        self.fire_rate_image = image
 
-        self.fire_rate_rect = self.level_image.get_rect()
+        self.fire_rate_rect = self.fire_rate_image.get_rect()
         self.fire_rate_rect.left = self.screen_rect.left + 10
         self.fire_rate_rect.bottom = self.screen_rect.bottom - 10
 
-    def show_score(self):
-        """Draw scores and level count to the screen."""
-        self.screen.blit(self.score_image, self.score_rect)
-        self.screen.blit(self.high_score_image, self.high_score_rect)
-        self.screen.blit(self.level_image, self.level_rect)
+    def refresh(self):
+        """Render the fields updated since the last frame was drawn."""
+        if not self.stale:
+            return
+        # The score goes first, the other fields are placed against it.
+        for field in ('score', 'high_score', 'level', 'fire_rate'):
+            if field in self.stale:
+                getattr(self, 'render_' + field)()
+        self.stale.clear()
+
+    def prep_ships(self):
+        """Show how many ships are left."""
+        self.ship_image = assets.load_image('ship.png')
+        width = self.ship_image.get_width()
+        self.ships = [(self.ship_image,
+                       self.ship_image.get_rect(x=10 + ship_number * width,
+                                                y=10))
+                      for ship_number in range(self.stats.ships_left)]
+
+    def images(self):
+        """Return the images of the scoreboard and where they go, in the
+        order they are drawn."""
+        self.refresh()
+        images = [(self.score_image, self.score_rect),
+                  (self.high_score_image, self.high_score_rect),
+                  (self.level_image, self.level_rect)]
         if self.settings.debug:
-            self.screen.blit(self.fire_rate_image, self.fire_rate_rect)
-        self.ships.draw(self.screen)
+            images.append((self.fire_rate_image, self.fire_rate_rect))
+        return images + self.ships
 
+    def show_score(self):
+        """Draw scores and level count to the screen."""
+        self.screen.blits(self.images(), False)
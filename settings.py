@@ -1,5 +1,3 @@
-import pygame
-
 class Settings():
     """A class to store all of the settings for alien invasion."""
 
@@ -12,8 +10,59 @@ class Settings():
         self.bg_colour = (230, 230, 230)
         self.columns = 0
         self.rows = 0
-        self.bg_image = pygame.image.load("images/dark_city.bmp")
+        self.bg_image = "dark_city.bmp"
         self.debug = False
+        # Print how long each step of starting up took, to the first frame.
+        self.report_startup = False
+        # Redraw only the regions of the screen that change each frame.
+        self.dirty_rendering = False
+
+        # Simulation ticks per second, the most ticks run to catch up before
+        # a frame is drawn, and a cap on frames drawn per second, 0 for none,
+        # which draws as fast as the machine allows.
+        # Speeds and the alien fire rate are given per tick at 60 ticks a
+        # second and scaled to the tick rate, so it does not change the pace
+        # of the game.
+        self.tick_rate = 60
+        self.max_frame_skip = 5
+        self.max_fps = 60
+
+        # Where the profiler's timings are drawn when toggled on with F3, and
+        # a CSV file to write each frame's timings to, None for none.
+        self.profiler_overlay_position = (10, 80)
+        self.profile_csv = None
+
+        # Seed of the game's random numbers, None for a fresh one each run,
+        # and a file to record the input of the session to, None for none.
+        self.seed = None
+        self.record_input = None
+
+        # The leaderboard file, None to keep no scores, and how many games
+        # it holds.
+        self.leaderboard_file = '.leaderboard'
+        self.leaderboard_size = 10
+
+        # A directory to record each frame drawn to, None for none, as 'png'
+        # or 'raw' files, keeping every capture_stride'th pixel, with room
+        # for capture_buffer frames waiting to be written.
+        self.capture_dir = None
+        self.capture_format = 'png'
+        self.capture_stride = 1
+        self.capture_buffer = 32
+
+        # An address to serve the state of the game to spectators on, as
+        # host:port or a Unix socket path, None for none. A spectator with
+        # more than spectator_max_buffer bytes waiting is skipped, and
+        # dropped once skipped for spectator_max_lag ticks.
+        self.spectator_address = None
+        self.spectator_max_buffer = 65536
+        self.spectator_max_lag = 300
+
+        # Pauses in seconds after the ship is lost, before a new level and
+        # before the play button returns at game over.
+        self.ship_lost_pause = 0.5
+        self.level_intro_pause = 0.5
+        self.game_over_pause = 1.0
 
         # Ship settings
         self.ship_speed_factor = 0
@@ -28,6 +77,8 @@ class Settings():
         self.rapidfire = False
         self.powerbullets = False
         self.widebullets = False
+        # Room in each of the ship and alien bullet pools.
+        self.bullet_capacity = 20000
 
         # Alien settings
         self.shim_y = 100
@@ -39,13 +90,16 @@ class Settings():
         self.alien_fire_rate = 0
         self.alien_columns_removed = 2
 
+        # Size of the cells of the collision grid.
+        self.grid_cell_size = 64
+
         # Blockade settings
         self.blockade_colour = 25, 70, 90
         self.block_width = 6
         self.block_height = 6
-
-        # fleet_direction of 1 represents right, -1 left.
-        self.fleet_direction = 1
+        # Each block is split into resolution by resolution cells, so the
+        # resolution must divide both block_width and block_height.
+        self.shield_resolution = 1
 
         # How quickly the game speeds up.
         self.speedup_scale = 1.2
@@ -64,6 +118,19 @@ class Settings():
         self.alien_fire_rate = 3000
         self.alien_points = 50
 
+        # fleet_direction of 1 represents right, -1 left.
+        self.fleet_direction = 1
+
+    def per_tick(self, speed):
+        """Convert a speed given per tick at 60 ticks a second to one per
+        tick at the tick rate."""
+        return speed * (60.0 / self.tick_rate)
+
+    def alien_fire_chance(self):
+        """Return the chance of an alien firing on a tick, alien_fire_rate
+        being the odds against at 60 ticks a second."""
+        return 1.0 / ((self.alien_fire_rate + 1) * (self.tick_rate / 60.0))
+
     def increase_speed(self):
         """Increase speed settings and alien point values."""
         self.ship_speed_factor *= self.speedup_scale
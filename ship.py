@@ -1,6 +1,8 @@
 import pygame
 from pygame.sprite import Sprite
 
+import assets
+
 class Ship(Sprite):
 
     def __init__(self, settings, screen):
@@ -10,9 +12,9 @@ class Ship(Sprite):
         self.screen = screen
         self.screen_rect = screen.get_rect()
 
-        # Load the ship image and get its rect.
-        self.image = pygame.image.load('images/ship.png').convert_alpha()
-        self.rect = self.image.get_rect()
+        # Get the ship's rect from the size of its image, which is not
+        # decoded until the ship is first drawn.
+        self.rect = pygame.Rect((0, 0), assets.image_size('ship.png'))
 
         # Start each new ship at the bottom center of the screen.
         self.rect.centerx = self.screen_rect.centerx
@@ -20,25 +22,45 @@ class Ship(Sprite):
 
         # Store decimal value for the ships center
         self.center = float(self.rect.centerx)
+        # And its value at the previous tick, to draw between the two.
+        self.previous_center = self.center
 
         # Movement flags
         self.moving_left = False
         self.moving_right = False
 
+    @property
+    def image(self):
+        """The ship image."""
+        return assets.load_image('ship.png')
+
     def update(self):
         """Update the ships position based on the movement flag."""
+        self.previous_center = self.center
         if self.moving_left and self.rect.left > self.screen_rect.left:
-            self.center -= self.settings.ship_speed_factor
+            self.center -= self.settings.per_tick(
+                    self.settings.ship_speed_factor)
         if self.moving_right and self.rect.right < self.screen_rect.right:
-            self.center += self.settings.ship_speed_factor
+            self.center += self.settings.per_tick(
+                    self.settings.ship_speed_factor)
 
         # Update rect object from self.center`
         self.rect.centerx = self.center
 
-    def blitme(self):
+    def draw_rect(self, alpha=1.0):
+        """Return where the ship is drawn, alpha of the way from its position
+        at the previous tick to its current one."""
+        rect = self.rect.copy()
+        rect.centerx = (self.previous_center +
+                        alpha * (self.center - self.previous_center))
+        return rect
+
+    def blitme(self, alpha=1.0):
         """Draw the ship at its current location."""
-        self.screen.blit(self.image, self.rect)
+        self.screen.blit(self.image, self.draw_rect(alpha))
 
     def center_ship(self):
         """Return ship to center for game restart."""
         self.center = self.screen_rect.centerx
+        self.previous_center = self.center
+        self.rect.centerx = self.center
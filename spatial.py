@@ -0,0 +1,133 @@
+"""Uniform grid broadphase for collision checks.
+
+Boxes are filed under every grid cell they cover, the cell keys being kept
+sorted so that the boxes in a cell are found by binary search. Building the
+grid and querying it are both done on whole arrays at once, so the cost of a
+frames collision checks grows with the number of boxes and queries rather
+than with their product.
+"""
+import numpy as np
+
+# Offset and stride used to fold a cells column and row into one key.
+_OFFSET = 1 << 15
+_STRIDE = 1 << 20
+
+def _as_arrays(rects):
+    """Return the left, top, right and bottom edges of a list of rects."""
+    if not rects:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty
+    edges = np.array([(r.left, r.top, r.right, r.bottom) for r in rects],
+                     dtype=np.int64)
+    return edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+
+
+class SpatialGrid():
+    """A uniform grid index of axis aligned boxes."""
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.build(*_as_arrays([]))
+
+    def __len__(self):
+        return self.left.size
+
+    def _cells(self, left, top, right, bottom):
+        """Return, for every cell covered by every box, the index of the box
+        and the key of the cell."""
+        size = self.cell_size
+        column0 = left // size
+        row0 = top // size
+        # Rects exclude their right and bottom edges.
+        columns = np.maximum(right - 1, left) // size - column0 + 1
+        rows = np.maximum(bottom - 1, top) // size - row0 + 1
+        counts = columns * rows
+
+        owner = np.repeat(np.arange(left.size), counts)
+        step = np.arange(owner.size) - np.repeat(np.cumsum(counts) - counts,
+                                                 counts)
+        column = column0[owner] + step % columns[owner]
+        row = row0[owner] + step // columns[owner]
+        return owner, (row + _OFFSET) * _STRIDE + column + _OFFSET
+
+    def build(self, left, top, right, bottom):
+        """Index a set of boxes given as arrays of their edges, box i is then
+        reported by its index i."""
+        self.left = np.asarray(left, dtype=np.int64)
+        self.top = np.asarray(top, dtype=np.int64)
+        self.right = np.asarray(right, dtype=np.int64)
+        self.bottom = np.asarray(bottom, dtype=np.int64)
+
+        owner, keys = self._cells(self.left, self.top, self.right,
+                                  self.bottom)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.items = owner[order]
+
+        # The extent of all the boxes, to turn away queries outside it.
+        if self.left.size:
+            self.bounds = (int(self.left.min()), int(self.top.min()),
+                           int(self.right.max()), int(self.bottom.max()))
+        else:
+            self.bounds = (0, 0, 0, 0)
+
+    def build_rects(self, rects):
+        """Index a list of rects, rect i is then reported by its index i."""
+        self.build(*_as_arrays(rects))
+
+    def query_many(self, left, top, right, bottom):
+        """Find every overlapping pair between the query boxes and the boxes
+        in the grid, return two arrays, the query indices and the indices of
+        the boxes they overlap, ordered by query."""
+        left = np.asarray(left, dtype=np.int64)
+        top = np.asarray(top, dtype=np.int64)
+        right = np.asarray(right, dtype=np.int64)
+        bottom = np.asarray(bottom, dtype=np.int64)
+        nothing = np.zeros(0, dtype=np.int64)
+        if not left.size or not self.keys.size:
+            return nothing, nothing
+
+        # Broadphase, every box filed in a cell the query covers.
+        query, keys = self._cells(left, top, right, bottom)
+        start = np.searchsorted(self.keys, keys, 'left')
+        end = np.searchsorted(self.keys, keys, 'right')
+        counts = end - start
+        query = np.repeat(query, counts)
+        keys = np.repeat(keys, counts)
+        step = np.arange(query.size) - np.repeat(np.cumsum(counts) - counts,
+                                                 counts)
+        item = self.items[np.repeat(start, counts) + step]
+
+        # Narrowphase, exact overlap as pygame's colliderect reckons it.
+        overlap = ((self.left[item] < right[query]) &
+                   (self.right[item] > left[query]) &
+                   (self.top[item] < bottom[query]) &
+                   (self.bottom[item] > top[query]))
+        query = query[overlap]
+        item = item[overlap]
+        keys = keys[overlap]
+
+        # A pair sharing several cells is found in each of them, keep it
+        # only in the cell holding the top left corner of the overlap.
+        corner_x = np.maximum(left[query], self.left[item])
+        corner_y = np.maximum(top[query], self.top[item])
+        size = self.cell_size
+        corner = ((corner_y // size + _OFFSET) * _STRIDE +
+                  corner_x // size + _OFFSET)
+        first = keys == corner
+        return query[first], item[first]
+
+    def query(self, rect):
+        """Return the indices of the boxes overlapping rect."""
+        left, top, right, bottom = self.bounds
+        if (rect.right <= left or rect.left >= right or
+                rect.bottom <= top or rect.top >= bottom):
+            return np.zeros(0, dtype=np.int64)
+        _, item = self.query_many([rect.left], [rect.top], [rect.right],
+                                  [rect.bottom])
+        return item
+
+    def query_rects(self, rects):
+        """Find every overlapping pair between a list of rects and the boxes
+        in the grid, as query_many."""
+        return self.query_many(*_as_arrays(rects))
@@ -0,0 +1,410 @@
+"""Stream the state of a game in play to spectators, and watch it.
+
+With Settings.spectator_address set, the game runs a server on a background
+thread that sends the state of the stats, ship, fleet, bullets and shields
+after each tick to any client connected, over TCP as host:port or over a
+Unix socket given as a path. Each state is sent as the sections that
+changed since the last state the client received, the changes being XORed
+against the old section and compressed. Clients too slow to keep up are
+sent fewer states, and dropped if they fall too far behind, so they never
+hold up the game.
+
+Run as a script, this connects to a game as a headless spectator, rebuilds
+its state and reports the bandwidth used per tick.
+
+    python spectator.py localhost:7777 --ticks 3600
+"""
+import argparse
+import asyncio
+import os
+import socket
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+MAGIC = b'AISP'
+VERSION = 3
+# Magic, version and screen size, sent once on connecting.
+HELLO = struct.Struct('<4sBHH')
+# Size of the rest of the frame, tick and mask of the sections sent.
+FRAME = struct.Struct('<IIB')
+# How a section is sent and the size of its data.
+SECTION = struct.Struct('<BI')
+
+# The sections of the state, in the order they are sent.
+SECTIONS = ['stats', 'ship', 'formation', 'fleet', 'bullets', 'shields']
+# Score, high score, level, ships left and flags for game_active and play.
+STATS = struct.Struct('<QQHhB')
+SHIP = struct.Struct('<d')
+# Columns, rows and size of an alien, followed by the offsets of each.
+FORMATION = struct.Struct('<IIHH')
+# The integer origin of the fleet, followed by its living aliens as bits.
+FLEET = struct.Struct('<ii')
+# Bullets in a pool, followed by the edges of each.
+POOL = struct.Struct('<I')
+# Shields standing, then the position and cell grid size of each, followed
+# by its cells as bits.
+SHIELDS = struct.Struct('<I')
+SHIELD = struct.Struct('<hhHH')
+
+# Section data sent whole or XORed against the last sent, compressed.
+RAW, XOR = range(2)
+
+
+def snapshot(stats, ship, fleet, bullets, blockade):
+    """Return the state of the game as a tuple of bytes, one per section."""
+    flags = int(stats.game_active) | int(stats.phase == 'play') << 1
+    stats_data = STATS.pack(int(stats.score), int(stats.high_score),
+                            stats.level, stats.ships_left, flags)
+    formation = (FORMATION.pack(fleet.columns, fleet.rows, fleet.width,
+                                fleet.height) +
+                 fleet.offset_x.astype('<i4').tobytes() +
+                 fleet.offset_y.astype('<i4').tobytes())
+    fleet_data = (FLEET.pack(*fleet.origin()) +
+                  np.packbits(fleet.alive).tobytes())
+    pools = []
+    for pool in bullets.pools():
+        pools.append(POOL.pack(pool.count))
+        pools.extend(np.asarray(edge, dtype='<i4').tobytes()
+                     for edge in pool.edges())
+    shields = [SHIELDS.pack(len(blockade))]
+    for shield in blockade.sprites():
+        shields.append(SHIELD.pack(shield.rect.x, shield.rect.y,
+                                   *shield.cells.shape))
+        shields.append(np.packbits(shield.cells).tobytes())
+    return (stats_data, SHIP.pack(ship.center), formation, fleet_data,
+            b''.join(pools), b''.join(shields))
+
+def encode(tick, state, baseline=None):
+    """Return a frame carrying the sections of state that differ from
+    baseline, or all of them if there is no baseline."""
+    mask = 0
+    parts = []
+    for number, data in enumerate(state):
+        old = baseline[number] if baseline is not None else None
+        if data == old:
+            continue
+        mask |= 1 << number
+        if old is not None and len(old) == len(data):
+            mode = XOR
+            data = np.bitwise_xor(np.frombuffer(data, np.uint8),
+                                  np.frombuffer(old, np.uint8)).tobytes()
+        else:
+            mode = RAW
+        data = zlib.compress(data, 1)
+        parts.append(SECTION.pack(mode, len(data)))
+        parts.append(data)
+    body = b''.join(parts)
+    return FRAME.pack(FRAME.size - 4 + len(body), tick, mask) + body
+
+def decode(frame, sections):
+    """Apply a frame to a list of section data in place, return the tick."""
+    _, tick, mask = FRAME.unpack_from(frame)
+    offset = FRAME.size
+    for number in range(len(SECTIONS)):
+        if not mask & 1 << number:
+            continue
+        mode, length = SECTION.unpack_from(frame, offset)
+        offset += SECTION.size
+        data = zlib.decompress(frame[offset:offset + length])
+        offset += length
+        if mode == XOR:
+            data = np.bitwise_xor(np.frombuffer(data, np.uint8),
+                                  np.frombuffer(sections[number],
+                                                np.uint8)).tobytes()
+        sections[number] = data
+    return tick
+
+
+class Spectator():
+    """A connected client, and the last state sent to it."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.baseline = None
+        self.behind = 0
+
+
+class SpectatorServer():
+    """Serve the state of the game to spectators from an asyncio loop on a
+    background thread. The game hands over each tick's state without
+    waiting, a state handed over before the last was sent replacing it."""
+
+    def __init__(self, settings):
+        self.address = settings.spectator_address
+        self.screen_size = (settings.screen_width, settings.screen_height)
+        # Bytes a client may have waiting to be sent before it is skipped,
+        # and ticks it may be skipped for before it is dropped.
+        self.max_buffer = settings.spectator_max_buffer
+        self.max_lag = settings.spectator_max_lag
+        self.clients = set()
+
+        self.lock = threading.Lock()
+        self.pending = None
+        self.scheduled = False
+
+        # States handed over and sent, clients served and dropped, and the
+        # bytes sent.
+        self.published = 0
+        self.broadcasts = 0
+        self.served = 0
+        self.dropped = 0
+        self.sent = 0
+
+        self.loop = None
+        self.server = None
+        self.unix = False
+        self.started = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        self.started.wait()
+
+    def run(self):
+        """Run the server until closed."""
+        loop = asyncio.new_event_loop()
+        try:
+            self.server = loop.run_until_complete(self.start_server())
+        except OSError as e:
+            print("Spectator server error: " + str(e))
+            loop.close()
+            self.started.set()
+            return
+        self.loop = loop
+        self.started.set()
+        loop.run_forever()
+        loop.run_until_complete(self.shutdown())
+        loop.close()
+        # Newer Pythons remove the socket file as the server closes.
+        if self.unix and os.path.exists(self.address):
+            os.remove(self.address)
+
+    async def shutdown(self):
+        """Stop listening and close every connection, waiting for each
+        client's task to finish."""
+        self.server.close()
+        # Aborting each connection lets its client's task finish, without
+        # waiting on clients that have stopped reading.
+        for client in list(self.clients):
+            client.writer.transport.abort()
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.server.wait_closed()
+
+    def start_server(self):
+        """Listen on host:port, or on a Unix socket at any other address."""
+        host, _, port = self.address.rpartition(':')
+        if port.isdigit():
+            return asyncio.start_server(self.serve, host or None, int(port))
+        self.unix = True
+        return asyncio.start_unix_server(self.serve, self.address)
+
+    async def serve(self, reader, writer):
+        """Greet a client then send it states until it goes."""
+        transport = writer.transport
+        sock = transport.get_extra_info('socket')
+        if sock is not None and sock.family != socket.AF_UNIX:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        writer.write(HELLO.pack(MAGIC, VERSION, *self.screen_size))
+        client = Spectator(writer)
+        self.clients.add(client)
+        self.served += 1
+        try:
+            while await reader.read(4096):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(client)
+            writer.close()
+
+    def publish(self, tick, stats, ship, fleet, bullets, blockade):
+        """Hand over the state of the game after a tick, without waiting
+        for it to be sent."""
+        if self.loop is None or not self.clients:
+            return
+        state = snapshot(stats, ship, fleet, bullets, blockade)
+        with self.lock:
+            self.pending = (tick, state)
+            self.published += 1
+            if self.scheduled:
+                return
+            self.scheduled = True
+        self.loop.call_soon_threadsafe(self.broadcast)
+
+    def broadcast(self):
+        """Send the latest state to every client able to take it, each
+        frame carrying the changes since the last state the client got."""
+        with self.lock:
+            tick, state = self.pending
+            self.pending = None
+            self.scheduled = False
+        self.broadcasts += 1
+
+        # Clients sent the same baseline share the same frame.
+        frames = {}
+        for client in list(self.clients):
+            waiting = client.writer.transport.get_write_buffer_size()
+            if waiting > self.max_buffer:
+                client.behind += 1
+                if client.behind > self.max_lag:
+                    self.clients.discard(client)
+                    self.dropped += 1
+                    client.writer.transport.abort()
+                continue
+            key = id(client.baseline)
+            frame = frames.get(key)
+            if frame is None:
+                frame = encode(tick, state, client.baseline)
+                frames[key] = frame
+            client.writer.write(frame)
+            client.baseline = state
+            client.behind = 0
+            self.sent += len(frame)
+
+    def close(self):
+        """Disconnect every client and stop the server."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    def report(self):
+        """Describe what was sent."""
+        return ("Sent {:,} of {:,} states to {} spectator(s), {} dropped, "
+                "{:,} bytes.".format(self.broadcasts, self.published,
+                                     self.served, self.dropped, self.sent))
+
+
+class SpectatorClient():
+    """Watch a game, rebuilding its state from the frames received."""
+
+    def __init__(self, address):
+        host, _, port = address.rpartition(':')
+        if port.isdigit():
+            self.socket = socket.create_connection((host or 'localhost',
+                                                   int(port)))
+        else:
+            self.socket = socket.socket(socket.AF_UNIX)
+            self.socket.connect(address)
+        self.stream = self.socket.makefile('rb')
+        magic, version, width, height = HELLO.unpack(
+                self.read(HELLO.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not serving version {} spectating."
+                             .format(address, VERSION))
+        self.screen_size = (width, height)
+        self.sections = [b''] * len(SECTIONS)
+        self.tick = None
+
+    def read(self, size):
+        """Read exactly size bytes."""
+        data = self.stream.read(size)
+        if len(data) < size:
+            raise EOFError("the game closed the connection")
+        return data
+
+    def receive(self):
+        """Read the next frame and apply it, return its size in bytes."""
+        header = self.read(4)
+        size, = struct.unpack('<I', header)
+        frame = header + self.read(size)
+        self.tick = decode(frame, self.sections)
+        return len(frame)
+
+    def state(self):
+        """Return the state of the game as last received."""
+        score, high_score, level, ships_left, flags = STATS.unpack(
+                self.sections[0])
+        state = {'tick': self.tick, 'score': score, 'high_score': high_score,
+                 'level': level, 'ships_left': ships_left,
+                 'game_active': bool(flags & 1), 'playing': bool(flags & 2),
+                 'ship_center': SHIP.unpack(self.sections[1])[0]}
+
+        formation = self.sections[2]
+        columns, rows, width, height = FORMATION.unpack_from(formation)
+        offsets = np.frombuffer(formation, '<i4', offset=FORMATION.size)
+        offset_x, offset_y = offsets.reshape(2, columns * rows)
+        x, y = FLEET.unpack_from(self.sections[3])
+        alive = np.unpackbits(np.frombuffer(self.sections[3], np.uint8,
+                                            offset=FLEET.size),
+                              count=columns * rows).astype(bool)
+        state['aliens'] = (offset_x[alive] + x, offset_y[alive] + y)
+        state['alien_size'] = (width, height)
+
+        data = self.sections[4]
+        offset = 0
+        state['bullets'] = []
+        while offset < len(data):
+            count, = POOL.unpack_from(data, offset)
+            offset += POOL.size
+            edges = np.frombuffer(data, '<i4', 4 * count, offset)
+            state['bullets'].append(edges.reshape(4, count))
+            offset += edges.nbytes
+
+        data = self.sections[5]
+        count, = SHIELDS.unpack_from(data)
+        offset = SHIELDS.size
+        state['shields'] = []
+        for _ in range(count):
+            x, y, cell_rows, cell_columns = SHIELD.unpack_from(data, offset)
+            offset += SHIELD.size
+            size = -(-cell_rows * cell_columns // 8)
+            cells = np.unpackbits(np.frombuffer(data, np.uint8, size, offset),
+                                  count=cell_rows * cell_columns)
+            offset += size
+            state['shields'].append((x, y, cells.reshape(cell_rows,
+                                                         cell_columns)))
+        return state
+
+    def close(self):
+        """Disconnect from the game."""
+        self.stream.close()
+        self.socket.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('address', help='host:port or Unix socket path')
+    parser.add_argument('--ticks', type=int, default=3600,
+                        help='frames to receive before stopping')
+    args = parser.parse_args()
+
+    client = SpectatorClient(args.address)
+    sizes = []
+    first = last = None
+    start = time.perf_counter()
+    try:
+        while len(sizes) < args.ticks:
+            sizes.append(client.receive())
+            if first is None:
+                first = client.tick
+            last = client.tick
+    except (EOFError, ConnectionError) as e:
+        print("Stopped: " + str(e))
+    finally:
+        client.close()
+    elapsed = time.perf_counter() - start
+    if not sizes:
+        print("Received nothing.")
+        return
+
+    state = client.state()
+    ticks = last - first + 1
+    sizes = np.array(sizes)
+    print("Received {:,} frames covering {:,} ticks in {:.1f}s, {:,} bytes."
+          .format(sizes.size, ticks, elapsed, int(sizes.sum())))
+    print("Frame size {:.0f} bytes mean, {:.0f} median, {} first, {} max; "
+          "{:.1f} bytes a tick, {:.1f} KiB/s.".format(
+          sizes.mean(), np.median(sizes), sizes[0], sizes.max(),
+          sizes.sum() / ticks, sizes.sum() / elapsed / 1024))
+    print("At tick {:,}: level {}, score {:,}, ships left {}, {} aliens, "
+          "{} bullets, {} shields.".format(
+          state['tick'], state['level'], state['score'],
+          state['ships_left'], state['aliens'][0].size,
+          sum(pool.shape[1] for pool in state['bullets']),
+          len(state['shields'])))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import time
+
+class FixedTimestep():
+    """Hand out the real time passing as fixed length simulation ticks, so
+    the game runs at the same speed however long a frame takes to draw."""
+
+    def __init__(self, tick_rate, max_ticks):
+        self.step = 1.0 / tick_rate
+        # The most ticks run before a frame is drawn, beyond which the game
+        # slows down rather than spending ever longer catching up.
+        self.max_ticks = max_ticks
+        self.accumulator = 0.0
+        self.last = time.perf_counter()
+
+        # Ticks run and ticks given up under load.
+        self.ticks = 0
+        self.dropped = 0
+
+    def reset(self):
+        """Start counting afresh, forgetting any time owed."""
+        self.accumulator = 0.0
+        self.last = time.perf_counter()
+
+    def advance(self):
+        """Return the number of ticks owed for the time since the last
+        call."""
+        now = time.perf_counter()
+        self.accumulator += now - self.last
+        self.last = now
+
+        ticks = int(self.accumulator / self.step)
+        if ticks > self.max_ticks:
+            self.dropped += ticks - self.max_ticks
+            ticks = self.max_ticks
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= ticks * self.step
+        self.ticks += ticks
+        return ticks
+
+    def alpha(self):
+        """Return how far time has run into the next tick, 0 to 1, for
+        drawing between the last tick and the one before."""
+        return min(self.accumulator / self.step, 1.0)
+
+    def report(self):
+        """Describe the ticks run and those given up."""
+        return "Ran {:,} ticks, gave up {:,} to keep up with drawing.".format(
+                self.ticks, self.dropped)
@@ -0,0 +1,198 @@
+"""Play many headless games across a grid of settings to tune difficulty.
+
+Each combination of the settings given is played by a simple bot for a
+number of seeded games, the games being shared out over a pool of processes,
+one per core. Levels reached, survival time, score and frame cost are
+reported for each combination.
+
+    python tune.py --set speedup_scale=1.1,1.2,1.3 --set fleet_drop_speed=5,10
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pygame
+
+from settings import Settings
+from headless import HeadlessGame, init_headless, key_event
+
+# The settings tuned when none are given.
+DEFAULT_GRID = {
+    'speedup_scale': [1.1, 1.2, 1.3],
+    'alien_fire_scale': [0.96, 0.98],
+}
+
+
+class Bot():
+    """A simple player, it starts the game, picks an alien in the front line
+    to chase and fires at it whenever it can. Events are supplied frame by
+    frame in place of a scripted input source."""
+
+    def __init__(self, seed, retarget=90, fire_every=8):
+        self.rng = np.random.default_rng(seed)
+        self.retarget = retarget
+        self.fire_every = fire_every
+        self.game = None
+        self.target = None
+        self.held = None
+
+    def events(self, frame):
+        """Return the bot's key presses for the frame."""
+        game = self.game
+        if frame == 0:
+            return [key_event(pygame.KEYDOWN, pygame.K_p)]
+        if not game.stats.game_active or game.stats.phase != 'play':
+            return self.release()
+
+        # Choose a new alien to chase now and then, or once it is gone.
+        shooters = game.fleet.shooters()
+        if not shooters.size:
+            return self.release()
+        if (self.target is None or not game.fleet.alive[self.target] or
+                not frame % self.retarget):
+            self.target = int(shooters[self.rng.integers(shooters.size)])
+
+        events = []
+        target_x = game.fleet.alien_rect(self.target).centerx
+        offset = target_x - game.ship.center
+        key = None
+        speed = game.settings.per_tick(game.settings.ship_speed_factor)
+        if offset < -speed:
+            key = pygame.K_LEFT
+        elif offset > speed:
+            key = pygame.K_RIGHT
+        if key != self.held:
+            events.extend(self.release())
+            if key is not None:
+                events.append(key_event(pygame.KEYDOWN, key))
+                self.held = key
+        if not frame % self.fire_every:
+            events.append(key_event(pygame.KEYDOWN, pygame.K_SPACE))
+            events.append(key_event(pygame.KEYUP, pygame.K_SPACE))
+        return events
+
+    def release(self):
+        """Let go of any movement key held."""
+        if self.held is None:
+            return []
+        key, self.held = self.held, None
+        return [key_event(pygame.KEYUP, key)]
+
+
+def play(job):
+    """Play one game with the given settings to the end or the frame limit,
+    return what it reached."""
+    overrides, seed, max_frames = job
+    settings = Settings()
+    for name, value in overrides:
+        setattr(settings, name, value)
+    settings.seed = seed
+    settings.leaderboard_file = None
+
+    bot = Bot(seed)
+    game = HeadlessGame(settings, bot)
+    bot.game = game
+    # Processor time, unlike the time passing, is not inflated when there
+    # are more workers than cores.
+    start = time.process_time()
+    game.step()
+    while game.stats.game_active and game.frame < max_frames:
+        game.step()
+    cpu = time.process_time() - start
+    return {'settings': overrides, 'level': game.stats.level,
+            'score': int(game.stats.score),
+            'survival': game.frame / settings.tick_rate,
+            'frame_cost': cpu / game.frame * 1e6, 'cpu': cpu}
+
+def parse_grid(assignments):
+    """Turn name=value,value options into a dict of name to values."""
+    grid = {}
+    for assignment in assignments:
+        name, _, values = assignment.partition('=')
+        if not hasattr(Settings(), name):
+            raise SystemExit("Settings has no attribute {}.".format(name))
+        grid[name] = [parse_value(value) for value in values.split(',')]
+    return grid
+
+def parse_value(text):
+    """Read a setting's value as an int if it is whole, else a float."""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+def cores():
+    """Return the number of cores the process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def run(grid, games, max_frames, workers):
+    """Play games games for each combination of the grid, return the results
+    and the time taken."""
+    names = sorted(grid)
+    combinations = [tuple(zip(names, values))
+                    for values in itertools.product(*(grid[name]
+                                                      for name in names))]
+    jobs = [(combination, seed, max_frames)
+            for combination in combinations for seed in range(games)]
+    start = time.perf_counter()
+    if workers == 1:
+        init_headless()
+        results = [play(job) for job in jobs]
+    else:
+        pool = multiprocessing.Pool(workers, initializer=init_headless)
+        try:
+            results = list(pool.imap_unordered(play, jobs))
+        finally:
+            # Let the workers finish rather than terminating them.
+            pool.close()
+            pool.join()
+    return combinations, results, time.perf_counter() - start
+
+def report(combinations, results):
+    """Print the mean of each measure for every combination."""
+    print("{:<48}{:>7}{:>10}{:>10}{:>10}{:>9}".format(
+          'settings', 'games', 'level', 'score', 'survival', 'us/frame'))
+    for combination in combinations:
+        games = [result for result in results
+                 if result['settings'] == combination]
+        mean = dict((measure, np.mean([game[measure] for game in games]))
+                    for measure in ('level', 'score', 'survival',
+                                    'frame_cost'))
+        label = ' '.join("{}={}".format(name, value)
+                         for name, value in combination)
+        print("{:<48}{:>7}{:>10.2f}{:>10,.0f}{:>9.1f}s{:>9.1f}".format(
+              label, len(games), mean['level'], mean['score'],
+              mean['survival'], mean['frame_cost']))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--set', action='append', default=[],
+                        metavar='NAME=VALUE,...',
+                        help='a setting and the values to try')
+    parser.add_argument('--games', type=int, default=8,
+                        help='seeded games played per combination')
+    parser.add_argument('--max-frames', type=int, default=36000,
+                        help='frames after which a game is stopped')
+    parser.add_argument('--workers', type=int, default=cores(),
+                        help='processes to play games in')
+    args = parser.parse_args()
+
+    grid = parse_grid(args.set) if args.set else DEFAULT_GRID
+    combinations, results, elapsed = run(grid, args.games, args.max_frames,
+                                         args.workers)
+    report(combinations, results)
+
+    # Processor time spent in games against the time taken shows how well
+    # the pool shares the work.
+    busy = sum(result['cpu'] for result in results)
+    print("\nPlayed {:,} games in {:.1f}s on {} worker(s), {:.2f}x the "
+          "speed of playing them one after another.".format(
+          len(results), elapsed, args.workers, busy / elapsed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""A batch of headless games to train agents against.
+
+VectorEnv steps N independent games together. Each step takes one action
+per game and returns observations built from the state of the ship, fleet,
+bullets and shields, without drawing anything, along with rewards and
+whether each game has ended. Ended games start again by themselves. The
+games are ticked one after another; their state is then gathered and the
+observations, rewards and endings of the batch are built with array
+operations across every game.
+
+    python vector_env.py --envs 16 --steps 2000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from settings import Settings
+from headless import HeadlessGame, init_headless
+
+import game_functions as gf
+
+# Actions, as the ship's movement and whether it fires.
+ACTIONS = [(0, False), (-1, False), (1, False),
+           (0, True), (-1, True), (1, True)]
+ACTION_MOVES = np.array([move for move, fire in ACTIONS])
+ACTION_FIRES = np.array([fire for move, fire in ACTIONS])
+
+# Alien bullets observed, those nearest the bottom of the screen.
+NEAREST_BULLETS = 8
+
+
+class VectorEnv():
+    """N games stepped together, observed as rows of one array."""
+
+    def __init__(self, number, seed=0, max_steps=36000, settings=None):
+        init_headless()
+        self.number = number
+        self.max_steps = max_steps
+        self.games = []
+        for index in range(number):
+            game_settings = settings() if settings else Settings()
+            game_settings.seed = seed + index
+            game_settings.leaderboard_file = None
+            self.games.append(HeadlessGame(game_settings))
+
+        # The shields of each game as built, to observe what stands of them.
+        self.shields = [[] for _ in range(number)]
+        self.steps = np.zeros(number, dtype=int)
+        self.scores = np.zeros(number)
+
+        game = self.games[0]
+        self.formation = game.settings.columns * game.settings.rows
+        self.shield_count = len(game.blockade)
+        self.size = (7 + self.formation + 3 * NEAREST_BULLETS +
+                     self.shield_count)
+        self.observations = np.zeros((number, self.size), dtype=np.float32)
+
+    def reset(self, seed=None):
+        """Start every game afresh, return the observations."""
+        for index in range(self.number):
+            if seed is not None:
+                self.games[index].stats.rng = np.random.default_rng(seed +
+                                                                    index)
+            self.reset_game(index)
+        self.observe()
+        return self.observations.copy()
+
+    def reset_game(self, index):
+        """Start one game afresh."""
+        game = self.games[index]
+        game.stats.game_active = False
+        gf.start_game(game.settings, game.stats, game.screen, game.sb,
+                      game.ship, game.fleet, game.bullets, game.blockade)
+        self.shields[index] = [(shield, shield.standing)
+                               for shield in game.blockade.sprites()]
+        self.steps[index] = 0
+        self.scores[index] = 0
+
+    def step(self, actions):
+        """Take an action in every game and run a tick of each. Return the
+        observations, rewards, which games ended, and the final score and
+        level of each game that did, games that end being started again."""
+        moves, fires = ACTION_MOVES[actions], ACTION_FIRES[actions]
+        for game, move, fire in zip(self.games, moves.tolist(),
+                                    fires.tolist()):
+            game.ship.moving_left = move < 0
+            game.ship.moving_right = move > 0
+            if fire and game.stats.phase == 'play':
+                gf.fire_bullet_ship(game.settings, game.screen, game.ship,
+                                    game.bullets)
+            game.tick()
+
+        scores, levels, active = np.array(
+                [(game.stats.score, game.stats.level, game.stats.game_active)
+                 for game in self.games]).T
+        rewards = scores - self.scores
+        self.scores = scores
+        self.steps += 1
+        dones = (active == 0) | (self.steps >= self.max_steps)
+        final_scores = np.where(dones, scores, 0.0)
+        final_levels = np.where(dones, levels, 0).astype(int)
+        for index in np.flatnonzero(dones).tolist():
+            self.reset_game(index)
+        self.observe()
+        return (self.observations.copy(), rewards, dones,
+                {'score': final_scores, 'level': final_levels})
+
+    def observe(self):
+        """Write the observations of every game as rows of one array: the
+        ship, the fleet's bounds and formation, the alien bullets nearest
+        the bottom, relative to the ship, and what stands of each shield.
+        Each game's state is gathered into arrays, then every row is built
+        at once."""
+        games = self.games
+        rows = self.observations
+        rows[:] = 0.0
+        # The values observed of each game, a game to a row.
+        (width, height, center, top, ships_left, ship_limit, playing,
+         friendly, allowed, direction, left, bottom) = np.array(
+                [(game.settings.screen_width, game.settings.screen_height,
+                  game.ship.center, game.ship.rect.top,
+                  game.stats.ships_left, game.settings.ship_limit,
+                  game.stats.phase == 'play', len(game.bullets.friendly),
+                  game.settings.bullets_allowd,
+                  game.settings.fleet_direction)
+                 + game.fleet.bounding_rect().bottomleft
+                 for game in games], dtype=float).T
+
+        rows[:, 0] = center / width
+        rows[:, 1] = ships_left / ship_limit
+        rows[:, 2] = playing
+        rows[:, 3] = friendly / allowed
+        rows[:, 4] = direction
+        rows[:, 5] = left / width
+        rows[:, 6] = bottom / height
+        start = 7
+        rows[:, start:start + self.formation] = np.stack(
+                [game.fleet.alive[:self.formation] for game in games])
+        start += self.formation
+
+        # The alien bullets of every game in one array, each tagged with
+        # its game, sorted by game and then lowest on the screen first.
+        pools = [game.bullets.alien for game in games]
+        counts = np.array([pool.count for pool in pools], dtype=int)
+        owner = np.repeat(np.arange(self.number), counts)
+        x = np.concatenate([pool.x[:pool.count] for pool in pools])
+        y = np.concatenate([pool.y[:pool.count] for pool in pools])
+        order = np.lexsort((-y, owner))
+        owner, x, y = owner[order], x[order], y[order]
+        # Each bullet's place in its game's order, keeping the nearest.
+        rank = np.arange(owner.size) - np.repeat(np.cumsum(counts) - counts,
+                                                 counts)
+        near = rank < NEAREST_BULLETS
+        owner, rank, x, y = owner[near], rank[near], x[near], y[near]
+        bullets = rows[:, start:start + 3 * NEAREST_BULLETS].reshape(
+                self.number, NEAREST_BULLETS, 3)
+        bullets[owner, rank, 0] = 1.0
+        bullets[owner, rank, 1] = (x - center[owner]) / width[owner]
+        bullets[owner, rank, 2] = (top[owner] - y) / height[owner]
+        start += 3 * NEAREST_BULLETS
+
+        rows[:, start:start + self.shield_count] = [
+                [shield.standing / float(standing) if shield.alive() else 0.0
+                 for shield, standing in shields]
+                for shields in self.shields]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--envs', type=int, default=16,
+                        help='games stepped together')
+    parser.add_argument('--steps', type=int, default=2000,
+                        help='steps to take')
+    args = parser.parse_args()
+
+    env = VectorEnv(args.envs)
+    observations = env.reset()
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    episodes = 0
+    for _ in range(args.steps):
+        actions = rng.integers(len(ACTIONS), size=args.envs)
+        observations, rewards, dones, info = env.step(actions)
+        episodes += int(dones.sum())
+    elapsed = time.perf_counter() - start
+    print("{} games, observations of {} values, {:,} steps of the batch "
+          "in {:.2f}s: {:,.0f} game steps a second, {} games ended.".format(
+          args.envs, observations.shape[1], args.steps, elapsed,
+          args.envs * args.steps / elapsed, episodes))
+
+if __name__ == '__main__':
+    main()